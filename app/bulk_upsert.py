@@ -0,0 +1,94 @@
+"""Upsert ensembliste des contacts (INSERT ... ON CONFLICT DO UPDATE).
+
+Remplace le SELECT par contact de la synchronisation : les lignes sont écrites
+par lots avec l'upsert natif du dialecte (PostgreSQL et SQLite).
+"""
+import hashlib
+import json
+from collections.abc import Iterable, Iterator
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import Contact
+
+# Champs synchronisés depuis Odoo (en plus de l'ID)
+SYNCED_FIELDS = ("name", "email", "phone")
+
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def content_hash(values: dict) -> str:
+    """Empreinte SHA-1 des champs synchronisés d'une ligne."""
+    payload = json.dumps([values[field] for field in SYNCED_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def contact_values(odoo_contact: dict) -> dict:
+    """Convertit un enregistrement Odoo en valeurs de ligne `contacts`.
+
+    Odoo renvoie `False` pour un champ vide : on le stocke comme NULL.
+    L'empreinte des champs synchronisés est calculée au passage.
+    """
+    values = {"id": odoo_contact["id"]}
+    for field in SYNCED_FIELDS:
+        value = odoo_contact.get(field)
+        values[field] = None if value is False else value
+    values["content_hash"] = content_hash(values)
+    return values
+
+
+def batches(rows: Iterable[dict], batch_size: int) -> Iterator[list[dict]]:
+    batch: list[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def dialect_insert(db: Session):
+    """Retourne la construction `insert()` du dialecte (supportant ON CONFLICT)."""
+    dialect = db.get_bind().dialect.name
+    insert = _INSERT_BY_DIALECT.get(dialect)
+    if insert is None:
+        raise RuntimeError(f"Upsert non supporté pour le dialecte '{dialect}'")
+    return insert
+
+
+def bulk_upsert_contacts(
+    db: Session,
+    rows: Iterable[dict],
+    batch_size: int | None = None,
+) -> int:
+    """Écrit les lignes par lots avec l'upsert natif du dialecte.
+
+    Une ligne existante n'est réécrite que si son empreinte diffère.
+    Ne fait pas de commit : la transaction reste gérée par l'appelant.
+    Retourne le nombre de lignes envoyées.
+    """
+    batch_size = batch_size or settings.sync_batch_size
+    insert = dialect_insert(db)
+
+    written = 0
+    for batch in batches(rows, batch_size):
+        stmt = insert(Contact.__table__).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                field: stmt.excluded[field]
+                for field in (*SYNCED_FIELDS, "content_hash")
+            },
+            where=Contact.__table__.c.content_hash.is_distinct_from(
+                stmt.excluded.content_hash
+            ),
+        )
+        db.execute(stmt)
+        written += len(batch)
+    return written
@@ -0,0 +1,189 @@
+"""Limite globale des appels Odoo simultanés du processus (bulkhead).
+
+Au plus `ODOO_MAX_IN_FLIGHT` appels sont en cours vers Odoo, tous clients
+confondus (API asynchrone, synchronisation, threads de lecture parallèle).
+Les appels suivants attendent dans une file de `ODOO_MAX_QUEUE` places,
+au plus `ODOO_QUEUE_TIMEOUT_SECONDS` ; au-delà, ils échouent immédiatement
+(`OdooBusy`, HTTP 429) ou à l'expiration de l'attente (`OdooUnavailable`,
+HTTP 503) au lieu de s'empiler sur Odoo.
+
+Le même limiteur sert aux threads et aux coroutines : les places libérées
+sont transmises dans l'ordre d'arrivée, y compris d'un thread à une boucle
+asyncio.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+
+from .config import settings
+from .resilience import OdooUnavailable
+
+
+class OdooBusy(OdooUnavailable):
+    """File d'attente des appels Odoo pleine : l'appel est refusé sans attendre."""
+
+
+class _Waiter:
+    """Appelant en file : thread (`event`) ou coroutine (`loop` + `future`)."""
+
+    __slots__ = ("event", "loop", "future", "state")
+
+    def __init__(self, event=None, loop=None, future=None) -> None:
+        self.event = event
+        self.loop = loop
+        self.future = future
+        self.state = "waiting"  # puis "granted" ou "abandoned"
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Bulkhead:
+    """Sémaphore borné avec file d'attente, utilisable depuis threads et coroutines."""
+
+    def __init__(
+        self,
+        max_in_flight: int | None = None,
+        max_queue: int | None = None,
+        timeout_seconds: float | None = None,
+    ) -> None:
+        self._max_in_flight = max_in_flight
+        self._max_queue = max_queue
+        self._timeout_seconds = timeout_seconds
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self.acquired = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.max_queue_depth = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @property
+    def max_in_flight(self) -> int:
+        return self._max_in_flight or settings.odoo_max_in_flight
+
+    @property
+    def max_queue(self) -> int:
+        return settings.odoo_max_queue if self._max_queue is None else self._max_queue
+
+    @property
+    def timeout_seconds(self) -> float:
+        if self._timeout_seconds is not None:
+            return self._timeout_seconds
+        return settings.odoo_queue_timeout_seconds
+
+    def _enter(self, waiter: _Waiter) -> bool:
+        """Prend une place libre (True) ou met `waiter` en file (False)."""
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                self.acquired += 1
+                return True
+            if len(self._waiters) >= self.max_queue:
+                self.rejected += 1
+                raise OdooBusy("Trop d'appels Odoo en attente", retry_after=1)
+            self._waiters.append(waiter)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+            return False
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Retire un appelant qui n'attend plus ; False s'il a déjà reçu une place."""
+        with self._lock:
+            if waiter.state == "granted":
+                return False
+            waiter.state = "abandoned"
+            self._waiters.remove(waiter)
+            return True
+
+    def _record_wait(self, started: float) -> None:
+        waited = time.monotonic() - started
+        with self._lock:
+            self.acquired += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def release(self) -> None:
+        """Libère une place, transmise directement au premier appelant en file."""
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.state = "granted"
+            else:
+                self._in_flight -= 1
+                return
+        waiter.wake()
+
+    def _timed_out(self) -> OdooUnavailable:
+        with self._lock:
+            self.timeouts += 1
+        return OdooUnavailable("Délai d'attente dépassé pour un appel Odoo", retry_after=1)
+
+    @contextmanager
+    def slot(self, timeout: float | None = None) -> Iterator[None]:
+        """Occupe une place pendant le bloc (threads)."""
+        waiter = _Waiter(event=threading.Event())
+        if not self._enter(waiter):
+            started = time.monotonic()
+            timeout = self.timeout_seconds if timeout is None else timeout
+            if not waiter.event.wait(timeout) and self._abandon(waiter):
+                raise self._timed_out()
+            self._record_wait(started)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self, timeout: float | None = None) -> AsyncIterator[None]:
+        """Occupe une place pendant le bloc (coroutines), sans bloquer la boucle."""
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop=loop, future=loop.create_future())
+        if not self._enter(waiter):
+            started = time.monotonic()
+            timeout = self.timeout_seconds if timeout is None else timeout
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            except asyncio.TimeoutError:
+                if self._abandon(waiter):
+                    raise self._timed_out() from None
+            except asyncio.CancelledError:
+                if not self._abandon(waiter):
+                    self.release()
+                raise
+            self._record_wait(started)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "max_queue_depth": self.max_queue_depth,
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "wait_seconds_avg": (
+                    round(self.wait_seconds_total / self.acquired, 4) if self.acquired else 0.0
+                ),
+                "wait_seconds_max": round(self.wait_seconds_max, 4),
+            }
+
+
+odoo_bulkhead = Bulkhead()
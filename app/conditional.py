@@ -0,0 +1,27 @@
+"""Requêtes conditionnelles (ETag / If-None-Match) sur les contacts en base.
+
+L'ETag est dérivé de la génération des données (`sync_state.generation`),
+incrémentée par chaque synchronisation qui modifie les contacts : un client
+à jour reçoit `304 Not Modified` sans que la table `contacts` soit lue.
+"""
+from fastapi import Response
+
+
+def contacts_etag(generation: int, variant: str = "json") -> str:
+    """ETag fort d'une représentation (`json` ou `ndjson`) à une génération donnée."""
+    return f'"g{generation}-{variant}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Compare un en-tête If-None-Match à `etag` (comparaison faible, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (value.strip() for value in if_none_match.split(","))
+    return etag in (value[2:] if value.startswith("W/") else value for value in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    """Réponse 304 sans corps, avec l'ETag courant."""
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept"})
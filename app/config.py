@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -8,6 +10,47 @@ class Settings(BaseSettings):
     odoo_db: str | None = Field(default=None, validation_alias="ODOO_DB")
     odoo_user: str | None = Field(default=None, validation_alias="ODOO_USER")
     odoo_password: str | None = Field(default=None, validation_alias="ODOO_PASSWORD")
+    # Protocole des appels Odoo : "xmlrpc" ou "jsonrpc" (plus compact et rapide à décoder)
+    odoo_protocol: Literal["xmlrpc", "jsonrpc"] = Field(
+        default="xmlrpc", validation_alias="ODOO_PROTOCOL"
+    )
+    # Nombre d'enregistrements par appel search_read paginé
+    odoo_page_size: int = Field(default=1000, validation_alias="ODOO_PAGE_SIZE")
+    # Pool de connexions keep-alive vers Odoo : connexions inactives conservées
+    # et durée d'inactivité (secondes) au-delà de laquelle elles sont fermées
+    odoo_pool_size: int = Field(default=8, validation_alias="ODOO_POOL_SIZE")
+    odoo_pool_idle_timeout: float = Field(default=60, validation_alias="ODOO_POOL_IDLE_TIMEOUT")
+    # Durée de validité (secondes) de l'uid Odoo en cache avant ré-authentification
+    odoo_session_ttl_seconds: float = Field(default=3600, validation_alias="ODOO_SESSION_TTL_SECONDS")
+    # Regroupement des lectures par ID : IDs max par appel et fenêtre d'attente
+    # (0 = appels faits dans le même tour de boucle asyncio)
+    odoo_loader_max_batch_size: int = Field(default=200, validation_alias="ODOO_LOADER_MAX_BATCH_SIZE")
+    odoo_loader_window_seconds: float = Field(default=0, validation_alias="ODOO_LOADER_WINDOW_SECONDS")
+    # Délai par tentative (socket) et échéance globale d'un appel, tentatives comprises
+    odoo_timeout_seconds: float = Field(default=60, validation_alias="ODOO_TIMEOUT_SECONDS")
+    odoo_deadline_seconds: float = Field(default=120, validation_alias="ODOO_DEADLINE_SECONDS")
+    # Nouvelles tentatives des lectures sur erreur transitoire (backoff exponentiel avec jitter)
+    odoo_retry_attempts: int = Field(default=3, validation_alias="ODOO_RETRY_ATTEMPTS")
+    odoo_retry_backoff_seconds: float = Field(default=0.2, validation_alias="ODOO_RETRY_BACKOFF_SECONDS")
+    # Disjoncteur : échecs consécutifs avant ouverture, puis durée d'ouverture
+    odoo_breaker_failure_threshold: int = Field(
+        default=5, validation_alias="ODOO_BREAKER_FAILURE_THRESHOLD"
+    )
+    odoo_breaker_reset_seconds: float = Field(default=30, validation_alias="ODOO_BREAKER_RESET_SECONDS")
+    # Limite globale des appels Odoo simultanés du processus, file d'attente
+    # et attente maximale d'une place (au-delà : 429/503)
+    odoo_max_in_flight: int = Field(default=16, validation_alias="ODOO_MAX_IN_FLIGHT")
+    odoo_max_queue: int = Field(default=64, validation_alias="ODOO_MAX_QUEUE")
+    odoo_queue_timeout_seconds: float = Field(default=5, validation_alias="ODOO_QUEUE_TIMEOUT_SECONDS")
+    # Nombre maximal de pages lues en parallèle (1 = lecture séquentielle)
+    odoo_parallelism: int = Field(default=1, validation_alias="ODOO_PARALLELISM")
+
+    # Cache des réponses de /fetch : durée de fraîcheur, puis durée pendant
+    # laquelle la réponse périmée est servie pendant son rafraîchissement
+    fetch_cache_ttl_seconds: float = Field(default=30, validation_alias="FETCH_CACHE_TTL_SECONDS")
+    fetch_cache_stale_seconds: float = Field(default=300, validation_alias="FETCH_CACHE_STALE_SECONDS")
+    # Valeur maximale de `limit` (et nombre max d'`ids`) sur /fetch
+    fetch_max_limit: int = Field(default=1000, validation_alias="FETCH_MAX_LIMIT")
 
     # Sécurité
     jwt_secret: str = Field(default="change-me-jwt", validation_alias="JWT_SECRET")
@@ -23,6 +66,37 @@ class Settings(BaseSettings):
         default="sqlite:///./contacts.db", validation_alias="DATABASE_URL"
     )
 
+    # Pagination de /contacts : taille de page par défaut (avec `after`) et maximale
+    contacts_page_size: int = Field(default=100, validation_alias="CONTACTS_PAGE_SIZE")
+    contacts_max_page_size: int = Field(default=1000, validation_alias="CONTACTS_MAX_PAGE_SIZE")
+    # Lignes lues (et envoyées) par lot en export streamé de /contacts
+    contacts_stream_batch_size: int = Field(default=1000, validation_alias="CONTACTS_STREAM_BATCH_SIZE")
+    # Cache des réponses /contacts par worker : taille max (octets, 0 = désactivé)
+    # et intervalle de relecture de la génération des données (secondes)
+    contacts_cache_max_bytes: int = Field(default=64 * 1024 * 1024, validation_alias="CONTACTS_CACHE_MAX_BYTES")
+    contacts_cache_check_seconds: float = Field(default=5, validation_alias="CONTACTS_CACHE_CHECK_SECONDS")
+
+    # Synchronisation Odoo -> DB
+    sync_batch_size: int = Field(default=500, validation_alias="SYNC_BATCH_SIZE")
+    # Nombre de pages Odoo en attente d'écriture (contre-pression du pipeline)
+    sync_queue_size: int = Field(default=4, validation_alias="SYNC_QUEUE_SIZE")
+    # Mode --daemon : intervalle entre deux passages et jitter aléatoire
+    sync_interval_seconds: float = Field(default=300, validation_alias="SYNC_INTERVAL_SECONDS")
+    sync_interval_jitter_seconds: float = Field(
+        default=5, validation_alias="SYNC_INTERVAL_JITTER_SECONDS"
+    )
+    # Verrou inter-processus : durée de vie (SQLite) et attente max d'un verrou occupé
+    sync_lock_ttl_seconds: int = Field(default=900, validation_alias="SYNC_LOCK_TTL_SECONDS")
+    sync_lock_wait_seconds: float = Field(default=0, validation_alias="SYNC_LOCK_WAIT_SECONDS")
+    # Intervalle entre deux réconciliations complètes (détection des suppressions)
+    sync_full_reconcile_seconds: int = Field(
+        default=3600, validation_alias="SYNC_FULL_RECONCILE_SECONDS"
+    )
+    # Recul du watermark à chaque passage incrémental (transactions Odoo validées tard)
+    sync_watermark_overlap_seconds: float = Field(
+        default=60, validation_alias="SYNC_WATERMARK_OVERLAP_SECONDS"
+    )
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_prefix="",
@@ -0,0 +1,135 @@
+"""Cache par processus des réponses de `/contacts` (octets JSON déjà encodés).
+
+Les contacts ne changent qu'à chaque synchronisation : la liste complète, les
+pages et les contacts par ID sont conservés sérialisés, dans la limite de
+`CONTACTS_CACHE_MAX_BYTES` (éviction LRU), surcoût mémoire de chaque entrée
+compris. La génération des données
+(`sync_state.generation`) est relue au plus toutes les
+`CONTACTS_CACHE_CHECK_SECONDS` ; quand elle change, tout le cache est vidé.
+Une réponse peut donc rester servie jusqu'à cet intervalle après la fin
+d'une synchronisation.
+
+Chaque worker a son propre cache : rien n'est partagé entre processus, et
+le fonctionnement est le même sur SQLite et PostgreSQL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+from .config import settings
+
+# Mémoire occupée par une entrée en plus de son corps (clé, tuple, dict
+# d'en-têtes, en-tête de l'objet bytes, nœud de l'OrderedDict) : environ
+# 270 octets mesurés avec tracemalloc sur des entrées ("id", n)
+_ENTRY_OVERHEAD_BYTES = 320
+
+
+def _entry_size(body: bytes) -> int:
+    return len(body) + _ENTRY_OVERHEAD_BYTES
+
+
+class ContactsCache:
+    """Cache LRU borné en octets, invalidé par la génération des données."""
+
+    def __init__(
+        self,
+        max_bytes: int | None = None,
+        check_seconds: float | None = None,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[bytes, dict]] = OrderedDict()
+        self._bytes = 0
+        self._generation: int | None = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation_checks = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return settings.contacts_cache_max_bytes if self._max_bytes is None else self._max_bytes
+
+    @property
+    def check_seconds(self) -> float:
+        if self._check_seconds is not None:
+            return self._check_seconds
+        return settings.contacts_cache_check_seconds
+
+    def generation(self, read_generation: Callable[[], int]) -> int:
+        """Génération courante, relue avec `read_generation` au plus une fois par intervalle.
+
+        Un changement de génération vide le cache.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._generation is not None and now - self._checked_at < self.check_seconds:
+                return self._generation
+        generation = read_generation()
+        with self._lock:
+            self.generation_checks += 1
+            self._checked_at = now
+            if generation != self._generation:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._bytes = 0
+                self._generation = generation
+            return generation
+
+    def get(self, key: Hashable, generation: int) -> tuple[bytes, dict] | None:
+        """Corps et en-têtes en cache pour `key` à cette génération, ou None."""
+        with self._lock:
+            entry = self._entries.get(key) if generation == self._generation else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, generation: int, body: bytes, headers: dict | None = None) -> None:
+        """Conserve une réponse lue à `generation` (ignorée si la génération a changé depuis)."""
+        size = _entry_size(body)
+        with self._lock:
+            if generation != self._generation or size > self.max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _entry_size(previous[0])
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= _entry_size(evicted)
+                self.evictions += 1
+            self._entries[key] = (body, dict(headers or {}))
+            self._bytes += size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = None
+            self._checked_at = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "generation": self._generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "generation_checks": self.generation_checks,
+            }
+
+
+contacts_cache = ContactsCache()
@@ -1,5 +1,5 @@
 """Configuration de la base de données."""
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from .config import settings
@@ -32,15 +32,43 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def create_tables(bind=engine) -> None:
+    """Crée les tables manquantes et ajoute les colonnes nullables manquantes.
+
+    `create_all` ne modifie pas une table existante : les colonnes ajoutées
+    aux modèles depuis (ex: `contacts.content_hash`) sont créées ici par un
+    `ALTER TABLE ... ADD COLUMN`.
+    """
+    Base.metadata.create_all(bind=bind)
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            with bind.begin() as conn:
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                )
+
+
+# Tables vérifiées par get_db (une fois par processus, pas à chaque requête)
+_tables_ready = False
+
+
 def get_db():
     """Dependency pour obtenir une session de base de données."""
+    global _tables_ready
     # S'assurer que les tables existent avant d'utiliser la DB
-    try:
-        Base.metadata.create_all(bind=engine)
-    except Exception as e:
-        # Log l'erreur mais continue (les tables existent peut-être déjà)
-        print(f"Warning: Could not ensure tables exist: {e}")
-    
+    if not _tables_ready:
+        try:
+            Base.metadata.create_all(bind=engine)
+            _tables_ready = True
+        except Exception as e:
+            # Log l'erreur mais continue (les tables existent peut-être déjà)
+            print(f"Warning: Could not ensure tables exist: {e}")
+
     db = SessionLocal()
     try:
         yield db
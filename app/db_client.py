@@ -1,21 +1,95 @@
 """Client pour accéder aux contacts depuis la base de données."""
+import base64
+import binascii
+import json
+from collections.abc import Iterator
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from .models import Contact
+from .sync_state import get_generation
+
+# Modèle Odoo synchronisé dans `contacts` (voir sync_contacts.py)
+CONTACTS_MODEL = "res.partner"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Curseur opaque de pagination (dernier ID renvoyé)."""
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """ID encodé dans un curseur ; ValueError si le curseur est invalide."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        last_id = data["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as exc:
+        raise ValueError("Curseur invalide") from exc
+    if not isinstance(last_id, int):
+        raise ValueError("Curseur invalide")
+    return last_id
+
+
+# Colonnes renvoyées par l'API (mêmes clés que Contact.to_dict)
+_CONTACT_COLUMNS = (Contact.id, Contact.name, Contact.email, Contact.phone)
+_CONTACT_KEYS = tuple(column.key for column in _CONTACT_COLUMNS)
+
+
+def _rows_to_dicts(rows) -> list[dict]:
+    return [dict(zip(_CONTACT_KEYS, row)) for row in rows]
 
 
 class DBClient:
-    """Client pour lire les contacts depuis la base de données."""
+    """Client pour lire les contacts depuis la base de données.
+
+    Les lectures sélectionnent les colonnes (tuples Core) au lieu d'hydrater
+    des instances `Contact` : pas d'identity map ni de suivi d'état.
+    """
 
     def __init__(self, db: Session):
         self.db = db
 
     def get_contacts(self):
         """Récupère tous les contacts depuis la base de données."""
-        contacts = self.db.query(Contact).all()
-        return [contact.to_dict() for contact in contacts]
+        statement = select(*_CONTACT_COLUMNS).order_by(Contact.id)
+        return _rows_to_dicts(self.db.execute(statement))
+
+    def get_contacts_page(self, limit: int, after_id: int | None = None) -> tuple[list[dict], int | None]:
+        """Page de contacts triés par ID, après `after_id` (pagination keyset).
+
+        Retourne les contacts et l'ID à passer pour la page suivante (None
+        s'il n'y en a pas). Le coût ne dépend que de `limit`, pas de la
+        taille de la table (parcours de la clé primaire).
+        """
+        statement = select(*_CONTACT_COLUMNS).order_by(Contact.id)
+        if after_id is not None:
+            statement = statement.where(Contact.id > after_id)
+        # Une ligne de plus pour savoir s'il reste une page
+        contacts = _rows_to_dicts(self.db.execute(statement.limit(limit + 1)))
+        next_after = contacts[limit - 1]["id"] if len(contacts) > limit else None
+        return contacts[:limit], next_after
+
+    def iter_contact_batches(self, batch_size: int) -> Iterator[list[dict]]:
+        """Parcourt tous les contacts triés par ID, par lots de `batch_size`.
+
+        Lecture par curseur côté serveur (`yield_per`, `stream_results` sur
+        PostgreSQL) : seul le lot en cours est en mémoire.
+        """
+        statement = (
+            select(*_CONTACT_COLUMNS)
+            .order_by(Contact.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for rows in self.db.execute(statement).partitions():
+            yield _rows_to_dicts(rows)
+
+    def get_generation(self) -> int:
+        """Génération des contacts, incrémentée par chaque synchronisation qui les modifie."""
+        return get_generation(self.db, CONTACTS_MODEL)
 
     def get_contact_by_id(self, contact_id: int):
         """Récupère un contact par ID depuis la base de données."""
-        contact = self.db.query(Contact).filter(Contact.id == contact_id).first()
-        return contact.to_dict() if contact else None
+        statement = select(*_CONTACT_COLUMNS).where(Contact.id == contact_id)
+        row = self.db.execute(statement).first()
+        return dict(zip(_CONTACT_KEYS, row)) if row else None
@@ -0,0 +1,146 @@
+"""Cache des réponses de `/fetch` devant les appels Odoo.
+
+- Une réponse reste fraîche `FETCH_CACHE_TTL_SECONDS` secondes (HIT).
+- Ensuite, et pendant `FETCH_CACHE_STALE_SECONDS`, elle est encore servie
+  (STALE) pendant qu'un rafraîchissement tourne en arrière-plan.
+- Au-delà, ou sans entrée, l'appel à Odoo est attendu (MISS) ; les requêtes
+  simultanées pour une même clé partagent un seul appel en vol.
+- Une requête `Cache-Control: no-cache` (ou `max-age=0`) ignore l'entrée en
+  cache et la remplace (BYPASS).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+
+from .config import settings
+
+Loader = Callable[[], Awaitable[object]]
+
+
+def wants_revalidation(cache_control: str | None) -> bool:
+    """Indique si l'en-tête `Cache-Control` de la requête refuse le cache."""
+    if not cache_control:
+        return False
+    directives = {part.strip().lower().replace(" ", "") for part in cache_control.split(",")}
+    return "no-cache" in directives or "max-age=0" in directives
+
+
+class ResponseCache:
+    """Cache TTL avec appel unique en vol par clé et service de données périmées."""
+
+    def __init__(
+        self,
+        ttl_seconds: float | None = None,
+        stale_seconds: float | None = None,
+        max_entries: int = 256,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[object, float]] = OrderedDict()
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    @property
+    def ttl_seconds(self) -> float:
+        return settings.fetch_cache_ttl_seconds if self._ttl_seconds is None else self._ttl_seconds
+
+    @property
+    def stale_seconds(self) -> float:
+        return (
+            settings.fetch_cache_stale_seconds if self._stale_seconds is None else self._stale_seconds
+        )
+
+    async def get(
+        self, key: Hashable, load: Loader, cache_control: str | None = None
+    ) -> tuple[object, str, float]:
+        """Retourne (valeur, statut, âge en secondes) ; statut HIT/STALE/MISS/BYPASS."""
+        if wants_revalidation(cache_control):
+            self.bypasses += 1
+            return await self._fetch(key, load), "BYPASS", 0.0
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl_seconds:
+                self.hits += 1
+                return value, "HIT", age
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                self._refresh_in_background(key, load)
+                return value, "STALE", age
+
+        self.misses += 1
+        return await self._fetch(key, load), "MISS", 0.0
+
+    def _current_task(self, key: Hashable) -> asyncio.Task | None:
+        """Appel en vol pour `key` sur la boucle courante, s'il y en a un."""
+        task = self._in_flight.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            return None
+        return task
+
+    def _start(self, key: Hashable, load: Loader) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(self._load(key, load))
+        self._in_flight[key] = task
+        return task
+
+    async def _fetch(self, key: Hashable, load: Loader):
+        task = self._current_task(key)
+        if task is None:
+            task = self._start(key, load)
+        else:
+            self.coalesced += 1
+        # shield : l'annulation d'un appelant (client parti) n'annule pas
+        # l'appel partagé avec les autres
+        return await asyncio.shield(task)
+
+    def _refresh_in_background(self, key: Hashable, load: Loader) -> None:
+        if self._current_task(key) is not None:
+            return
+        self.refreshes += 1
+        task = self._start(key, load)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        # L'entrée périmée reste servie si le rafraîchissement échoue
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_errors += 1
+
+    async def _load(self, key: Hashable, load: Loader):
+        try:
+            value = await load()
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+        finally:
+            if self._in_flight.get(key) is asyncio.current_task():
+                del self._in_flight[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+        }
+
+
+fetch_cache = ResponseCache()
@@ -0,0 +1,99 @@
+"""Paramètres de `/fetch` traduits en domaine Odoo (filtrage côté Odoo).
+
+Seuls les paramètres et champs des listes blanches ci-dessous sont
+acceptés : le domaine est toujours construit ici, jamais recopié depuis la
+requête.
+"""
+from datetime import datetime, timezone
+
+from .config import settings
+from .odoo_client import CONTACT_FIELDS
+
+# Paramètres de requête acceptés par /fetch
+FETCH_PARAMS = frozenset(
+    {"email", "name", "is_company", "ids", "modified_since", "fields", "limit", "offset"}
+)
+
+# Champs res.partner qui peuvent être demandés avec `fields`
+ALLOWED_FIELDS = frozenset(
+    {
+        "name",
+        "email",
+        "phone",
+        "mobile",
+        "is_company",
+        "company_name",
+        "street",
+        "zip",
+        "city",
+        "country_id",
+        "write_date",
+    }
+)
+
+# Format des dates dans les domaines Odoo (UTC)
+_ODOO_DATETIME = "%Y-%m-%d %H:%M:%S"
+
+
+def check_params(names) -> None:
+    """Lève ValueError pour un paramètre de requête hors liste blanche."""
+    unknown = sorted(set(names) - FETCH_PARAMS)
+    if unknown:
+        raise ValueError(f"Paramètres non supportés: {', '.join(unknown)}")
+
+
+def parse_fields(fields: str | None) -> list[str]:
+    """Liste de champs séparés par des virgules, vérifiée contre la liste blanche."""
+    if not fields:
+        return list(CONTACT_FIELDS)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in ALLOWED_FIELDS]
+    if unknown:
+        raise ValueError(f"Champs non autorisés: {', '.join(unknown)}")
+    return list(dict.fromkeys(requested))
+
+
+def _odoo_datetime(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime(_ODOO_DATETIME)
+
+
+def build_fetch_query(
+    email: str | None = None,
+    name: str | None = None,
+    is_company: bool | None = None,
+    ids: list[int] | None = None,
+    modified_since: datetime | None = None,
+    fields: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+) -> dict:
+    """Construit domaine, champs et pagination pour `get_contacts`.
+
+    Retourne un dict `domain`, `fields`, `limit`, `offset` (qui sert aussi
+    de clé de cache). Lève ValueError si un paramètre est invalide.
+    """
+    if limit is not None and limit > settings.fetch_max_limit:
+        raise ValueError(f"limit ne peut pas dépasser {settings.fetch_max_limit}")
+    if ids is not None and len(ids) > settings.fetch_max_limit:
+        raise ValueError(f"ids ne peut pas contenir plus de {settings.fetch_max_limit} valeurs")
+
+    domain = []
+    if email:
+        domain.append(("email", "ilike", email))
+    if name:
+        domain.append(("name", "ilike", name))
+    if is_company is not None:
+        domain.append(("is_company", "=", is_company))
+    if ids:
+        domain.append(("id", "in", sorted(set(ids))))
+    if modified_since is not None:
+        domain.append(("write_date", ">", _odoo_datetime(modified_since)))
+
+    return {
+        "domain": domain,
+        "fields": parse_fields(fields),
+        "limit": limit,
+        "offset": offset,
+    }
@@ -0,0 +1,25 @@
+"""Sérialisation JSON rapide des réponses (orjson).
+
+Les endpoints qui renvoient `FastJSONResponse` court-circuitent
+`jsonable_encoder` et la validation de FastAPI : le contenu (dicts, listes,
+types JSON natifs) est encodé directement en octets, identiques à ceux de
+`JSONResponse`.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+
+
+def dumps(content: Any) -> bytes:
+    """Encode `content` en JSON compact (UTF-8)."""
+    return orjson.dumps(content)
+
+
+class FastJSONResponse(Response):
+    """Réponse JSON encodée par `dumps`, sans passer par `jsonable_encoder`."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
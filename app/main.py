@@ -1,18 +1,33 @@
+import json
+import math
+from collections.abc import Iterator
 from contextlib import asynccontextmanager
+from datetime import datetime
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from .config import settings  # noqa: F401  # chargé pour valider la config au démarrage
-from .database import Base, engine, get_db
-from .db_client import DBClient
-from .odoo_client import OdooClient
+from .conditional import contacts_etag, etag_matches, not_modified
+from .config import settings
+from .contacts_cache import contacts_cache
+from .database import create_tables, engine, get_db
+from .bulkhead import OdooBusy, odoo_bulkhead
+from .db_client import DBClient, decode_cursor, encode_cursor
+from .fetch_cache import fetch_cache
+from .fetch_filters import build_fetch_query, check_params
+from .json_response import FastJSONResponse, dumps
+from .odoo_async import close_async_odoo_clients, get_async_odoo_client
+from .odoo_session import session_cache
+from .odoo_transport import pool_stats
+from .resilience import OdooUnavailable, breaker_stats
 from .security import (
     authenticate_user,
     create_access_token,
     get_current_user,
     verify_hmac,
 )
+from .sync_telemetry import get_sync_status
 
 
 @asynccontextmanager
@@ -20,13 +35,14 @@ async def lifespan(app: FastAPI):
     """Gère le cycle de vie de l'application."""
     # Startup: Créer les tables au démarrage (avec gestion d'erreur)
     try:
-        Base.metadata.create_all(bind=engine)
+        create_tables(engine)
     except Exception as e:
         # Log l'erreur mais ne bloque pas le démarrage
         # Les tables seront créées à la première requête si nécessaire
         print(f"Warning: Could not create tables at startup: {e}")
     yield
-    # Shutdown: Nettoyage si nécessaire
+    # Shutdown: fermer les connexions vers Odoo
+    await close_async_odoo_clients()
 
 
 app = FastAPI(title="Odoo Contacts API", version="1.0.0", lifespan=lifespan)
@@ -67,56 +83,254 @@ async def health():
         "environment": {
             "has_database_url": bool(getattr(settings, "database_url", None)),
             "has_odoo_config": bool(getattr(settings, "odoo_url", None)),
-        }
+        },
+        # Compteurs seulement : l'adresse d'Odoo n'est pas exposée
+        "odoo_pool": pool_stats(),
+        "odoo_sessions": session_cache.stats(),
+        "fetch_cache": fetch_cache.stats(),
+        "odoo_breakers": breaker_stats(),
+        "odoo_bulkhead": odoo_bulkhead.stats(),
+        "contacts_cache": contacts_cache.stats(),
     }
 
 
+@app.get("/sync/status")
+async def sync_status(
+    limit: int = Query(default=10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Derniers passages de synchronisation et fraîcheur des données."""
+    try:
+        return get_sync_status(db, limit=limit)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
 @app.post("/auth/login")
 async def login(username: str = Depends(authenticate_user)):
     access_token = create_access_token(subject=username)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+def odoo_http_error(exc: Exception) -> HTTPException:
+    """503 quand Odoo est indisponible, 429 quand trop d'appels attendent, 500 sinon.
+
+    `Retry-After` est renseigné quand le délai est connu.
+    """
+    if isinstance(exc, OdooUnavailable):
+        headers = None
+        if exc.retry_after:
+            headers = {"Retry-After": str(math.ceil(exc.retry_after))}
+        status_code = 429 if isinstance(exc, OdooBusy) else 503
+        return HTTPException(status_code=status_code, detail=str(exc), headers=headers)
+    return HTTPException(status_code=500, detail=str(exc))
+
+
 @app.get("/fetch")
-async def get_fetched_contacts():
-    """Récupère les contacts directement depuis Odoo."""
+async def get_fetched_contacts(
+    request: Request,
+    response: Response,
+    email: str | None = Query(default=None, max_length=254),
+    name: str | None = Query(default=None, max_length=128),
+    is_company: bool | None = None,
+    ids: list[int] | None = Query(default=None),
+    modified_since: datetime | None = None,
+    fields: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    offset: int = Query(default=0, ge=0),
+    cache_control: str | None = Header(default=None),
+):
+    """Récupère les contacts directement depuis Odoo (sans bloquer la boucle).
+
+    Les filtres (`email`, `name` : contient ; `is_company`, `ids`,
+    `modified_since`), les champs (`fields=name,email`) et la pagination
+    (`limit`, `offset`) sont appliqués par Odoo ; voir app.fetch_filters.
+    Les réponses sont mises en cache (voir app.fetch_cache) ; l'en-tête
+    `X-Cache` indique HIT, STALE, MISS ou BYPASS (`Cache-Control: no-cache`).
+    """
     try:
-        odoo = OdooClient()
-        return odoo.get_contacts()
+        check_params(request.query_params.keys())
+        query = build_fetch_query(
+            email, name, is_company, ids, modified_since, fields, limit, offset
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    try:
+        odoo = get_async_odoo_client()
+        contacts, status, age = await fetch_cache.get(
+            json.dumps(query, sort_keys=True),
+            lambda: odoo.get_contacts(**query),
+            cache_control,
+        )
     except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+        raise odoo_http_error(exc) from exc
+
+    response.headers["X-Cache"] = status
+    response.headers["Age"] = str(int(age))
+    return contacts
+
+
+@app.get("/fetch/{contact_id}")
+async def get_fetched_contact(contact_id: int):
+    """Récupère un contact directement depuis Odoo.
+
+    Les requêtes simultanées sont regroupées en un seul appel Odoo.
+    """
+    try:
+        odoo = get_async_odoo_client()
+        contact = await odoo.get_contact_by_id(contact_id)
+    except Exception as exc:
+        raise odoo_http_error(exc) from exc
+
+    if not contact:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return contact
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _ndjson_chunks(batches: Iterator[list[dict]]) -> Iterator[bytes]:
+    """Un contact JSON par ligne, un bloc envoyé par lot lu en base."""
+    for batch in batches:
+        yield b"".join(dumps(contact) + b"\n" for contact in batch)
+
+
+def _json_array_chunks(batches: Iterator[list[dict]]) -> Iterator[bytes]:
+    """Tableau JSON envoyé au fil des lots lus en base."""
+    separator = b"["
+    for batch in batches:
+        if batch:
+            yield separator + b",".join(dumps(contact) for contact in batch)
+            separator = b","
+    yield b"[]" if separator == b"[" else b"]"
 
 
 @app.get(
     "/contacts",
     dependencies=[Depends(verify_hmac)],
+    response_class=FastJSONResponse,
 )
 async def get_contacts(
+    request: Request,
+    limit: int | None = Query(default=None, ge=1),
+    after: str | None = None,
+    stream: bool = False,
+    accept: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
     current_user: str = Depends(get_current_user),  # noqa: ARG001
     db: Session = Depends(get_db),
 ):
-    """Récupère tous les contacts depuis la base de données."""
+    """Récupère les contacts depuis la base de données.
+
+    Avec `limit` et/ou `after` (curseur opaque), renvoie une page triée par
+    ID (pagination keyset) ; le curseur de la page suivante est dans les
+    en-têtes `X-Next-Cursor` et `Link` (rel="next"). Sans paramètre, tous
+    les contacts sont renvoyés (compatibilité).
+
+    Export complet en streaming, lu en base par lots au fil de l'envoi :
+    NDJSON avec `Accept: application/x-ndjson`, tableau JSON avec
+    `stream=true`.
+
+    Les réponses portent un ETag dérivé de la génération des données : un
+    `If-None-Match` correspondant reçoit `304` sans lecture des contacts.
+    La liste et les pages sont servies depuis le cache du worker tant que
+    la génération ne change pas (voir app.contacts_cache).
+    """
+    ndjson = accept is not None and NDJSON_MEDIA_TYPE in accept
+    if (ndjson or stream) and (limit is not None or after is not None):
+        raise HTTPException(
+            status_code=400,
+            detail="L'export streamé ne se combine pas avec limit/after",
+        )
+    if limit is not None and limit > settings.contacts_max_page_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit ne peut pas dépasser {settings.contacts_max_page_size}",
+        )
     try:
-        db_client = DBClient(db)
-        return db_client.get_contacts()
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+        after_id = decode_cursor(after) if after else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    db_client = DBClient(db)
+    generation = contacts_cache.generation(db_client.get_generation)
+    etag = contacts_etag(generation, "ndjson" if ndjson else "json")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = {"ETag": etag, "Vary": "Accept"}
+
+    if ndjson or stream:
+        batches = db_client.iter_contact_batches(settings.contacts_stream_batch_size)
+        if ndjson:
+            return StreamingResponse(
+                _ndjson_chunks(batches), media_type=NDJSON_MEDIA_TYPE, headers=headers
+            )
+        return StreamingResponse(
+            _json_array_chunks(batches), media_type="application/json", headers=headers
+        )
+
+    if limit is None and after is None:
+        key = ("list",)
+    else:
+        limit = limit or settings.contacts_page_size
+        key = ("page", limit, after_id)
+
+    cached = contacts_cache.get(key, generation)
+    if cached is not None:
+        body, extra = cached
+        headers["X-Cache"] = "HIT"
+    else:
+        extra = {}
+        try:
+            if key[0] == "list":
+                contacts = db_client.get_contacts()
+            else:
+                contacts, next_after = db_client.get_contacts_page(limit, after_id)
+                if next_after is not None:
+                    extra["X-Next-Cursor"] = encode_cursor(next_after)
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+        body = dumps(contacts)
+        contacts_cache.put(key, generation, body, extra)
+        headers["X-Cache"] = "MISS"
+
+    if "X-Next-Cursor" in extra:
+        cursor = extra["X-Next-Cursor"]
+        next_url = request.url.include_query_params(limit=limit, after=cursor)
+        headers["X-Next-Cursor"] = cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return Response(body, media_type="application/json", headers=headers)
 
 
 @app.get(
     "/contacts/{contact_id}",
     dependencies=[Depends(verify_hmac)],
+    response_class=FastJSONResponse,
 )
 async def get_contact(
     contact_id: int,
+    if_none_match: str | None = Header(default=None),
     current_user: str = Depends(get_current_user),  # noqa: ARG001
     db: Session = Depends(get_db),
 ):
-    """Récupère un contact par ID depuis la base de données."""
+    """Récupère un contact par ID depuis la base de données (ETag et cache comme `/contacts`)."""
     db_client = DBClient(db)
-    contact = db_client.get_contact_by_id(contact_id)
+    generation = contacts_cache.generation(db_client.get_generation)
+    etag = contacts_etag(generation)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    key = ("id", contact_id)
+    cached = contacts_cache.get(key, generation)
+    if cached is not None:
+        return Response(cached[0], media_type="application/json", headers={"ETag": etag, "X-Cache": "HIT"})
 
+    contact = db_client.get_contact_by_id(contact_id)
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
-    return contact
+    body = dumps(contact)
+    contacts_cache.put(key, generation, body)
+    return Response(body, media_type="application/json", headers={"ETag": etag, "X-Cache": "MISS"})
 
@@ -1,5 +1,5 @@
 """Modèles de base de données pour les contacts."""
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Float, Integer, String, Table
 
 from .database import Base
 
@@ -13,6 +13,8 @@ class Contact(Base):
     name = Column(String, nullable=True)
     email = Column(String, nullable=True)
     phone = Column(String, nullable=True)
+    # Empreinte des champs synchronisés (voir app.bulk_upsert.content_hash)
+    content_hash = Column(String(40), nullable=True)
 
     def to_dict(self):
         """Convertit le modèle en dictionnaire."""
@@ -22,3 +24,81 @@ class Contact(Base):
             "email": self.email,
             "phone": self.phone,
         }
+
+
+# Table tampon des réconciliations complètes : sans clé primaire ni index pour
+# un chargement rapide, puis fusionnée dans `contacts` (voir app.staging)
+contacts_staging = Table(
+    "contacts_staging",
+    Base.metadata,
+    Column("id", Integer, nullable=False),
+    Column("name", String, nullable=True),
+    Column("email", String, nullable=True),
+    Column("phone", String, nullable=True),
+    Column("content_hash", String(40), nullable=True),
+)
+
+
+class SyncState(Base):
+    """État de synchronisation par modèle Odoo (watermark incrémental)."""
+
+    __tablename__ = "sync_state"
+
+    model = Column(String, primary_key=True)  # ex: "res.partner"
+    # Watermark : dernière write_date Odoo vue, départagée par l'ID
+    watermark_write_date = Column(String, nullable=True)
+    watermark_id = Column(Integer, nullable=False, default=0)
+    last_full_sync_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+    # Génération des données : incrémentée à chaque synchronisation qui modifie
+    # les contacts (sert d'ETag à /contacts) ; NULL équivaut à 0
+    generation = Column(Integer, nullable=True)
+
+
+class SyncLock(Base):
+    """Verrou de synchronisation à durée limitée (bases sans advisory locks)."""
+
+    __tablename__ = "sync_locks"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class SyncRun(Base):
+    """Historique des passages de synchronisation (télémétrie)."""
+
+    __tablename__ = "sync_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(DateTime, nullable=False, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    mode = Column(String, nullable=True)  # "full" / "incremental"
+    outcome = Column(String, nullable=False)  # "success" / "skipped" / "error"
+    error = Column(String, nullable=True)
+    fetched = Column(Integer, nullable=True)
+    inserted = Column(Integer, nullable=True)
+    updated = Column(Integer, nullable=True)
+    unchanged = Column(Integer, nullable=True)
+    deleted = Column(Integer, nullable=True)
+    total = Column(Integer, nullable=True)
+    # Durées par phase (secondes)
+    duration_seconds = Column(Float, nullable=True)
+    auth_seconds = Column(Float, nullable=True)
+    fetch_seconds = Column(Float, nullable=True)
+    diff_seconds = Column(Float, nullable=True)
+    write_seconds = Column(Float, nullable=True)
+    commit_seconds = Column(Float, nullable=True)
+    rows_per_second = Column(Float, nullable=True)
+    bytes_received = Column(Integer, nullable=True)
+    # Pic de mémoire résidente du passage (Linux), sinon du processus
+    peak_memory_kb = Column(Integer, nullable=True)
+
+    def to_dict(self):
+        """Convertit le passage en dictionnaire (dates ISO 8601)."""
+        data = {column.name: getattr(self, column.name) for column in self.__table__.columns}
+        for key in ("started_at", "finished_at"):
+            if data[key] is not None:
+                data[key] = data[key].isoformat()
+        return data
@@ -0,0 +1,199 @@
+"""Client Odoo asynchrone (JSON-RPC sur httpx) pour les endpoints FastAPI.
+
+`OdooClient` (XML-RPC) est bloquant : appelé depuis un handler `async def`,
+une réponse lente d'Odoo gèle toute la boucle d'événements du worker.
+`AsyncOdooClient` expose la même surface (`get_contacts`,
+`get_contact_by_id`) en coroutines, sur le endpoint `/jsonrpc` d'Odoo ; un
+worker peut ainsi garder des centaines d'appels en vol.
+
+L'uid est partagé avec le client XML-RPC via `app.odoo_session`.
+"""
+import asyncio
+import itertools
+import weakref
+
+import httpx
+
+from .bulkhead import odoo_bulkhead
+from .config import settings
+from .odoo_client import CONTACT_FIELDS, check_odoo_settings
+from .odoo_loader import ContactLoader
+from .odoo_session import session_cache
+from .resilience import IDEMPOTENT_METHODS, acall_with_resilience, get_breaker
+
+
+class OdooRPCError(RuntimeError):
+    """Erreur renvoyée par Odoo dans une réponse JSON-RPC."""
+
+    def __init__(self, error: dict) -> None:
+        data = error.get("data") or {}
+        self.name = data.get("name") or ""
+        self.code = error.get("code")
+        super().__init__(data.get("message") or error.get("message") or "Erreur JSON-RPC Odoo")
+
+    @property
+    def access_denied(self) -> bool:
+        text = f"{self.name} {self}".lower()
+        return "accessdenied" in text or "access denied" in text
+
+
+class AsyncOdooClient:
+    """Client Odoo asynchrone, à utiliser depuis une seule boucle d'événements.
+
+    `http` permet d'injecter un `httpx.AsyncClient` (tests, transport
+    personnalisé) ; sinon un client keep-alive est créé avec les limites
+    du pool XML-RPC (`ODOO_POOL_SIZE`, `ODOO_POOL_IDLE_TIMEOUT`).
+    """
+
+    def __init__(self, http: httpx.AsyncClient | None = None) -> None:
+        check_odoo_settings()
+        self._session_key = (settings.odoo_url, settings.odoo_db, settings.odoo_user)
+        self.breaker = get_breaker(settings.odoo_url)
+        self._http = http or httpx.AsyncClient(
+            base_url=settings.odoo_url,
+            # Par tentative ; l'échéance globale est gérée par app.resilience
+            timeout=httpx.Timeout(settings.odoo_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=settings.odoo_pool_size,
+                keepalive_expiry=settings.odoo_pool_idle_timeout,
+            ),
+        )
+        self._ids = itertools.count(1)
+        self._login_lock = asyncio.Lock()
+        self.uid: int | None = None
+        # Regroupe les get_contact_by_id simultanés en un seul appel Odoo
+        self.contact_loader = ContactLoader(self.get_contacts_by_ids)
+
+    async def _call(self, service: str, method: str, *args):
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "call",
+            "params": {"service": service, "method": method, "args": list(args)},
+            "id": next(self._ids),
+        }
+        response = await self._http.post("/jsonrpc", json=payload)
+        response.raise_for_status()
+        body = response.json()
+        if body.get("error"):
+            raise OdooRPCError(body["error"])
+        return body.get("result")
+
+    async def _get_uid(self) -> int:
+        """uid en cache, ou login unique partagé par les appelants simultanés."""
+        uid = session_cache.peek(self._session_key)
+        if uid is not None:
+            return uid
+        async with self._login_lock:
+            uid = session_cache.peek(self._session_key)
+            if uid is None:
+                uid = await acall_with_resilience(
+                    self.breaker,
+                    lambda: self._call(
+                        "common",
+                        "authenticate",
+                        settings.odoo_db,
+                        settings.odoo_user,
+                        settings.odoo_password,
+                        {},
+                    ),
+                    idempotent=True,
+                    bulkhead=odoo_bulkhead,
+                )
+                if not uid:
+                    raise RuntimeError("Échec d'authentification Odoo")
+                session_cache.store(self._session_key, uid)
+            return uid
+
+    async def execute_kw(self, model: str, method: str, args: list, kwargs: dict | None = None):
+        """Appelle `execute_kw`, avec un nouveau login si la session est refusée.
+
+        Délais, nouvelles tentatives et disjoncteur : voir app.resilience.
+        """
+        for attempt in range(2):
+            uid = await self._get_uid()
+            self.uid = uid
+            try:
+                return await acall_with_resilience(
+                    self.breaker,
+                    lambda: self._call(
+                        "object",
+                        "execute_kw",
+                        settings.odoo_db,
+                        uid,
+                        settings.odoo_password,
+                        model,
+                        method,
+                        args,
+                        kwargs or {},
+                    ),
+                    idempotent=method in IDEMPOTENT_METHODS,
+                    bulkhead=odoo_bulkhead,
+                )
+            except OdooRPCError as exc:
+                if attempt or not exc.access_denied:
+                    raise
+                session_cache.invalidate(self._session_key, uid)
+
+    async def get_contacts(
+        self,
+        domain: list | None = None,
+        fields: list[str] | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ):
+        """Récupère les contacts (res.partner), comme `OdooClient.get_contacts`.
+
+        `limit` et `offset` sont appliqués par Odoo, sur un tri par ID stable.
+        """
+        kwargs = {"fields": fields or CONTACT_FIELDS}
+        if limit is not None or offset:
+            kwargs.update(order="id asc", offset=offset)
+            if limit is not None:
+                kwargs["limit"] = limit
+        return await self.execute_kw("res.partner", "search_read", [domain or []], kwargs)
+
+    async def get_contacts_by_ids(self, contact_ids: list[int]) -> list[dict]:
+        """Lit plusieurs contacts en un appel (les IDs inexistants sont ignorés).
+
+        `search_read` sur `id in ids` plutôt que `read` : un ID supprimé ne
+        fait pas échouer la lecture des autres (MissingError).
+        """
+        return await self.execute_kw(
+            "res.partner",
+            "search_read",
+            [[("id", "in", contact_ids)]],
+            {"fields": CONTACT_FIELDS, "context": {"active_test": False}},
+        )
+
+    async def get_contact_by_id(self, contact_id: int):
+        """Récupère un contact par ID, comme `OdooClient.get_contact_by_id`.
+
+        Les appels simultanés sont regroupés par `contact_loader`.
+        """
+        return await self.contact_loader.load(contact_id)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+# Un client par boucle d'événements : les connexions httpx ne peuvent pas
+# être partagées entre boucles (TestClient en crée une par requête)
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+
+
+def get_async_odoo_client() -> AsyncOdooClient:
+    """Retourne le client asynchrone partagé de la boucle courante."""
+    key = (settings.odoo_url, settings.odoo_db, settings.odoo_user)
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = AsyncOdooClient()
+    return client
+
+
+async def close_async_odoo_clients() -> None:
+    """Ferme les clients de la boucle courante (arrêt de l'application)."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
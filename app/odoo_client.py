@@ -1,67 +1,336 @@
+import threading
 import xmlrpc.client
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
+from .bulkhead import odoo_bulkhead
 from .config import settings
+from .odoo_session import session_cache
+from .odoo_transport import JsonRpcProxy, PooledTransport, get_pool
+from .resilience import IDEMPOTENT_METHODS, call_with_resilience, get_breaker
+
+# Champs lus sur res.partner ('id' est toujours inclus)
+CONTACT_FIELDS = ["name", "email", "phone"]
+
+
+def modified_since_domain(write_date: str, last_id: int) -> list:
+    """Domaine Odoo des enregistrements modifiés après le watermark.
+
+    Le watermark est le couple (write_date, id) : l'ID départage les
+    enregistrements qui partagent la même write_date.
+    """
+    return [
+        "|",
+        ("write_date", ">", write_date),
+        "&",
+        ("write_date", "=", write_date),
+        ("id", ">", last_id),
+    ]
+
+
+def check_odoo_settings() -> None:
+    """Lève une RuntimeError si la configuration Odoo est incomplète."""
+    missing = [
+        name
+        for name, value in {
+            "ODOO_URL": settings.odoo_url,
+            "ODOO_DB": settings.odoo_db,
+            "ODOO_USER": settings.odoo_user,
+            "ODOO_PASSWORD": settings.odoo_password,
+        }.items()
+        if not value
+    ]
+    if missing:
+        raise RuntimeError(
+            "Variables d'environnement Odoo manquantes: "
+            + ", ".join(missing)
+            + ". Ajoute-les dans ton shell ou dans un fichier .env."
+        )
+
+
+def _is_access_denied(fault: xmlrpc.client.Fault) -> bool:
+    """Indique si la Fault Odoo signale une session/identifiants refusés."""
+    text = f"{fault.faultCode} {fault.faultString}".lower()
+    return "accessdenied" in text or "access denied" in text
+
+
+PROTOCOLS = ("xmlrpc", "jsonrpc")
 
 
 class OdooClient:
-    def __init__(self) -> None:
-        missing = [
-            name
-            for name, value in {
-                "ODOO_URL": settings.odoo_url,
-                "ODOO_DB": settings.odoo_db,
-                "ODOO_USER": settings.odoo_user,
-                "ODOO_PASSWORD": settings.odoo_password,
-            }.items()
-            if not value
-        ]
-        if missing:
-            raise RuntimeError(
-                "Variables d'environnement Odoo manquantes: "
-                + ", ".join(missing)
-                + ". Ajoute-les dans ton shell ou dans un fichier .env."
-            )
+    def __init__(self, protocol: str | None = None) -> None:
+        check_odoo_settings()
+        # Protocole des appels : "xmlrpc" (par défaut) ou "jsonrpc" (ODOO_PROTOCOL)
+        self.protocol = protocol or settings.odoo_protocol
+        if self.protocol not in PROTOCOLS:
+            raise ValueError(f"Protocole Odoo inconnu: {self.protocol!r}")
+
+        # Octets reçus d'Odoo (toutes connexions confondues), pour la télémétrie
+        self.bytes_received = 0
+        self._bytes_lock = threading.Lock()
 
-        self.common = xmlrpc.client.ServerProxy(f"{settings.odoo_url}/xmlrpc/2/common")
-        self.uid = self.common.authenticate(
-            settings.odoo_db,
-            settings.odoo_user,
-            settings.odoo_password,
-            {},
+        # Délais, nouvelles tentatives et disjoncteur (voir app.resilience)
+        self.breaker = get_breaker(settings.odoo_url)
+        self.common = self._server_proxy("common")
+        # uid partagé par tous les clients du processus (voir app.odoo_session)
+        self._session_key = (settings.odoo_url, settings.odoo_db, settings.odoo_user)
+        self.uid = session_cache.get_uid(self._session_key, self._login)
+        self.models = self._server_proxy("object")
+        # Connexions XML-RPC propres à chaque thread du pool de lecture
+        # (ServerProxy n'est pas thread-safe)
+        self._local = threading.local()
+
+    def _login(self) -> int:
+        """Authentifie l'utilisateur Odoo et retourne son uid."""
+        uid = call_with_resilience(
+            self.breaker,
+            lambda: self.common.authenticate(
+                settings.odoo_db, settings.odoo_user, settings.odoo_password, {}
+            ),
+            idempotent=True,
+            bulkhead=odoo_bulkhead,
         )
-        if not self.uid:
+        if not uid:
             raise RuntimeError("Échec d'authentification Odoo")
-        self.models = xmlrpc.client.ServerProxy(f"{settings.odoo_url}/xmlrpc/2/object")
+        return uid
 
-    def get_contacts(self):
-        """Récupère tous les contacts (res.partner) selon la doc Odoo.
-        
+    def _execute_kw(
+        self,
+        model: str,
+        method: str,
+        args: list,
+        kwargs: dict | None = None,
+        proxy=None,
+    ):
+        """Appelle `execute_kw` avec l'uid en cache.
+
+        L'uid est relu à chaque appel (ré-authentification après expiration
+        du TTL). Sur une Fault « access denied » (session invalidée côté
+        Odoo, mot de passe changé...), la session est oubliée et l'appel
+        rejoué une fois après un nouveau login. Les lectures sont retentées
+        sur erreur transitoire ; `OdooUnavailable` est levée si Odoo reste
+        injoignable ou si le disjoncteur est ouvert.
+        """
+        proxy = proxy or self.models
+        for attempt in range(2):
+            uid = session_cache.get_uid(self._session_key, self._login)
+            self.uid = uid
+            try:
+                return call_with_resilience(
+                    self.breaker,
+                    lambda: proxy.execute_kw(
+                        settings.odoo_db, uid, settings.odoo_password, model, method, args, kwargs or {}
+                    ),
+                    idempotent=method in IDEMPOTENT_METHODS,
+                    bulkhead=odoo_bulkhead,
+                )
+            except xmlrpc.client.Fault as fault:
+                if attempt or not _is_access_denied(fault):
+                    raise
+                # Seulement si aucun autre thread n'a déjà renouvelé la session
+                session_cache.invalidate(self._session_key, uid)
+
+    def _count_bytes(self, size: int) -> None:
+        with self._bytes_lock:
+            self.bytes_received += size
+
+    def _server_proxy(self, service: str):
+        """Crée un proxy vers le service Odoo `service` (`common`, `object`).
+
+        En XML-RPC, un `ServerProxy` sur `/xmlrpc/2/<service>` ; en JSON-RPC,
+        un `JsonRpcProxy` sur `/jsonrpc`, avec la même interface. Les
+        connexions viennent du pool keep-alive partagé par hôte (voir
+        app.odoo_transport) ; les octets reçus sont comptés au passage.
+        """
+        if self.protocol == "jsonrpc":
+            url = f"{settings.odoo_url}/jsonrpc"
+            return JsonRpcProxy(
+                get_pool(url), urlsplit(url).path, service, on_read=self._count_bytes
+            )
+        url = f"{settings.odoo_url}/xmlrpc/2/{service}"
+        transport = PooledTransport(get_pool(url), on_read=self._count_bytes)
+        return xmlrpc.client.ServerProxy(url, transport=transport)
+
+    def _thread_models(self):
+        """Retourne le proxy `object` du thread courant (créé à la demande)."""
+        proxy = getattr(self._local, "models", None)
+        if proxy is None:
+            proxy = self._server_proxy("object")
+            self._local.models = proxy
+        return proxy
+
+    def get_contacts(
+        self,
+        domain: list | None = None,
+        fields: list[str] | None = None,
+        parallelism: int = 1,
+    ):
+        """Récupère les contacts (res.partner) selon la doc Odoo.
+
+        Sans domaine, tous les contacts sont renvoyés. Avec `parallelism > 1`,
+        les pages sont lues en parallèle (voir `iter_contact_pages`).
         Note: Le champ 'id' est toujours inclus même si non explicitement demandé.
         """
-        return self.models.execute_kw(
-            settings.odoo_db,
-            self.uid,
-            settings.odoo_password,
+        if parallelism > 1:
+            return [
+                contact
+                for page in self.iter_contact_pages(domain, fields, parallelism=parallelism)
+                for contact in page
+            ]
+        return self._execute_kw(
             "res.partner",
             "search_read",
-            [[]],  # Domaine vide = tous les enregistrements
-            {"fields": ["name", "email", "phone"]},  # 'id' est toujours inclus
+            [domain or []],  # Domaine vide = tous les enregistrements
+            {"fields": fields or CONTACT_FIELDS},  # 'id' est toujours inclus
         )
 
+    def iter_contact_pages(
+        self,
+        domain: list | None = None,
+        fields: list[str] | None = None,
+        page_size: int | None = None,
+        parallelism: int | None = None,
+    ) -> Iterator[list[dict]]:
+        """Parcourt les contacts page par page (pagination keyset sur l'ID).
+
+        Chaque appel `search_read` est limité à `page_size` enregistrements
+        triés par ID ; la page suivante reprend après le dernier ID vu. La
+        mémoire reste bornée à une page, quelle que soit la taille de la table.
+
+        Avec `parallelism > 1` (par défaut `ODOO_PARALLELISM`), les pages sont
+        lues par un pool de threads ; elles sont toujours renvoyées dans l'ordre.
+        """
+        page_size = page_size or settings.odoo_page_size
+        parallelism = parallelism or settings.odoo_parallelism
+        if parallelism > 1:
+            yield from self._iter_pages_parallel(domain, fields, page_size, parallelism)
+            return
+
+        last_id = 0
+        while True:
+            page = self._execute_kw(
+                "res.partner",
+                "search_read",
+                [list(domain or []) + [("id", ">", last_id)]],
+                {
+                    "fields": fields or CONTACT_FIELDS,
+                    "order": "id asc",
+                    "limit": page_size,
+                },
+            )
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            last_id = page[-1]["id"]
+
+    def _iter_pages_parallel(
+        self,
+        domain: list | None,
+        fields: list[str] | None,
+        page_size: int,
+        parallelism: int,
+    ) -> Iterator[list[dict]]:
+        """Lit les pages en parallèle, au plus `parallelism` appels en vol.
+
+        Les IDs correspondant au domaine sont d'abord obtenus par un `search`
+        (entiers seulement), puis découpés en pages lues par `search_read`
+        sur `id in [...]`, chaque thread avec sa propre connexion. Au plus
+        `parallelism` pages sont en cours ou en attente de consommation.
+        """
+        ids = self._execute_kw(
+            "res.partner",
+            "search",
+            [list(domain or [])],
+            {"order": "id asc"},
+        )
+        chunks = (ids[start:start + page_size] for start in range(0, len(ids), page_size))
+
+        pool = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="odoo-fetch")
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(self._read_page, chunk, fields))
+                if len(pending) >= parallelism:
+                    break
+            while pending:
+                page = pending.popleft().result()
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    pending.append(pool.submit(self._read_page, next_chunk, fields))
+                yield page
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _read_page(self, ids: list[int], fields: list[str] | None) -> list[dict]:
+        """Lit une page d'IDs depuis un thread du pool.
+
+        `search_read` sur `id in ids` ignore les enregistrements supprimés
+        entre le `search` initial et la lecture (contrairement à `read`).
+        """
+        return self._execute_kw(
+            "res.partner",
+            "search_read",
+            [[("id", "in", ids)]],
+            {
+                "fields": fields or CONTACT_FIELDS,
+                "order": "id asc",
+                "context": {"active_test": False},
+            },
+            proxy=self._thread_models(),
+        )
+
+    def iter_contacts_modified_since(
+        self,
+        write_date: str,
+        last_id: int,
+        page_size: int | None = None,
+    ) -> Iterator[list[dict]]:
+        """Parcourt par pages les contacts modifiés après le watermark (write_date, id).
+
+        Les pages sont triées par (write_date, id) et chaque page reprend
+        après le dernier couple vu (pagination keyset sur le watermark) : un
+        contact modifié pendant le parcours passe en fin de liste et sera lu
+        par une page suivante, donc avant que le watermark ne le dépasse.
+        Les pages sont lues l'une après l'autre, sans pool de threads.
+
+        Les contacts archivés sont inclus (champ 'active') pour que la
+        synchronisation incrémentale puisse les retirer de la base.
+        """
+        page_size = page_size or settings.odoo_page_size
+        while True:
+            domain = modified_since_domain(write_date, last_id)
+            domain.append(("active", "in", [True, False]))
+            page = self._execute_kw(
+                "res.partner",
+                "search_read",
+                [domain],
+                {
+                    "fields": CONTACT_FIELDS + ["write_date", "active"],
+                    "order": "write_date asc, id asc",
+                    "limit": page_size,
+                },
+            )
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            write_date, last_id = page[-1]["write_date"], page[-1]["id"]
+
     def get_contact_by_id(self, contact_id: int):
         """Récupère un contact par ID selon la doc Odoo.
         
         Note: Le format correct est [ids] où ids est une liste d'IDs.
         Le champ 'id' est toujours inclus même si non explicitement demandé.
         """
-        result = self.models.execute_kw(
-            settings.odoo_db,
-            self.uid,
-            settings.odoo_password,
+        result = self._execute_kw(
             "res.partner",
             "read",
             [[contact_id]],  # Format: liste contenant une liste d'IDs
-            {"fields": ["name", "email", "phone"]},  # 'id' est toujours inclus
+            {"fields": CONTACT_FIELDS},  # 'id' est toujours inclus
         )
         return result[0] if result else None
-
@@ -0,0 +1,83 @@
+"""Regroupement des lectures Odoo par ID (façon « dataloader »).
+
+Les appels `load(id)` faits dans le même tour de boucle (ou dans une fenêtre
+de `ODOO_LOADER_WINDOW_SECONDS`) sont fusionnés en un seul appel Odoo sur la
+liste des IDs, dédoublonnée et limitée à `ODOO_LOADER_MAX_BATCH_SIZE` ; chaque
+appelant reçoit ensuite son propre enregistrement (ou None s'il n'existe pas).
+"""
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from .config import settings
+
+FetchMany = Callable[[list[int]], Awaitable[list[dict]]]
+
+
+class ContactLoader:
+    """Regroupe les lectures par ID d'une boucle d'événements.
+
+    `fetch_many(ids)` doit retourner les enregistrements existants (avec leur
+    clé 'id'), dans un ordre quelconque.
+    """
+
+    def __init__(
+        self,
+        fetch_many: FetchMany,
+        max_batch_size: int | None = None,
+        window_seconds: float | None = None,
+    ) -> None:
+        self._fetch_many = fetch_many
+        self.max_batch_size = max_batch_size or settings.odoo_loader_max_batch_size
+        self.window_seconds = (
+            settings.odoo_loader_window_seconds if window_seconds is None else window_seconds
+        )
+        self._pending: dict[int, list[asyncio.Future]] = {}
+        self._handle: asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.loads = 0
+        self.batches = 0
+
+    async def load(self, contact_id: int) -> dict | None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.loads += 1
+        self._pending.setdefault(contact_id, []).append(future)
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._handle is None:
+            if self.window_seconds > 0:
+                self._handle = loop.call_later(self.window_seconds, self._dispatch)
+            else:
+                self._handle = loop.call_soon(self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        self.batches += 1
+        task = asyncio.get_running_loop().create_task(self._resolve(batch))
+        # Garder une référence tant que la tâche tourne
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: dict[int, list[asyncio.Future]]) -> None:
+        try:
+            rows = await self._fetch_many(list(batch))
+        except Exception as exc:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+        by_id = {row["id"]: row for row in rows}
+        for contact_id, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(by_id.get(contact_id))
+
+    def stats(self) -> dict:
+        return {"loads": self.loads, "batches": self.batches, "pending": len(self._pending)}
@@ -0,0 +1,86 @@
+"""Cache process-wide des sessions Odoo authentifiées.
+
+L'uid retourné par `common.authenticate` est conservé par (url, db, user)
+pendant `ODOO_SESSION_TTL_SECONDS`. Les appelants simultanés d'une clé non
+encore authentifiée partagent un seul appel de login.
+"""
+import threading
+import time
+from collections.abc import Callable
+
+from .config import settings
+
+SessionKey = tuple[str | None, str | None, str | None]
+
+
+class SessionCache:
+    """uid Odoo par (url, db, user), avec expiration et login unique par clé."""
+
+    def __init__(self, ttl_seconds: float | None = None) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._entries: dict[SessionKey, tuple[int, float]] = {}
+        self._key_locks: dict[SessionKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.logins = 0
+        self.invalidations = 0
+
+    @property
+    def ttl_seconds(self) -> float:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return settings.odoo_session_ttl_seconds
+
+    def peek(self, key: SessionKey) -> int | None:
+        """uid en cache et non expiré, sans login."""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def store(self, key: SessionKey, uid: int) -> None:
+        """Enregistre un uid obtenu par un login externe (client asynchrone)."""
+        self.logins += 1
+        self._entries[key] = (uid, time.monotonic() + self.ttl_seconds)
+
+    def get_uid(self, key: SessionKey, login: Callable[[], int]) -> int:
+        """Retourne l'uid en cache, ou appelle `login` (une seule fois par clé)."""
+        uid = self.peek(key)
+        if uid is not None:
+            self.hits += 1
+            return uid
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Un autre thread a pu s'authentifier pendant l'attente
+            uid = self.peek(key)
+            if uid is not None:
+                self.hits += 1
+                return uid
+            uid = login()
+            self.store(key, uid)
+            return uid
+
+    def invalidate(self, key: SessionKey, uid: int | None = None) -> None:
+        """Oublie la session (si `uid` est donné, seulement si c'est encore elle)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (uid is None or entry[0] == uid):
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._entries),
+            "hits": self.hits,
+            "logins": self.logins,
+            "invalidations": self.invalidations,
+        }
+
+
+session_cache = SessionCache()
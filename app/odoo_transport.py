@@ -0,0 +1,310 @@
+"""Transport HTTP keep-alive mutualisé pour les appels XML-RPC vers Odoo.
+
+`xmlrpc.client.ServerProxy` garde au mieux une connexion par proxy, et chaque
+`OdooClient` crée les siens : chaque client paie une nouvelle connexion TCP
+(et une poignée de main TLS). Ici, les connexions sont conservées dans un
+pool par hôte, partagé par tous les clients et tous les threads du processus.
+
+`JsonRpcProxy` utilise le même pool pour le endpoint `/jsonrpc` d'Odoo
+(`ODOO_PROTOCOL=jsonrpc`), moins verbeux et plus rapide à décoder.
+"""
+import functools
+import http.client
+import itertools
+import json
+import ssl
+import threading
+import time
+import xmlrpc.client
+from collections import deque
+from urllib.parse import urlsplit
+
+from .config import settings
+from .resilience import attempt_timeout
+
+# Erreurs indiquant qu'une connexion réutilisée a été fermée par le serveur
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+class ConnectionPool:
+    """Pool thread-safe de connexions HTTP(S) keep-alive vers un hôte.
+
+    Au plus `maxsize` connexions inactives sont conservées ; une connexion
+    inactive depuis plus de `idle_timeout` secondes est fermée au lieu
+    d'être réutilisée.
+    """
+
+    def __init__(
+        self,
+        scheme: str,
+        host: str,
+        maxsize: int | None = None,
+        idle_timeout: float | None = None,
+        context: ssl.SSLContext | None = None,
+    ) -> None:
+        self.scheme = scheme
+        self.host = host
+        self.maxsize = maxsize or settings.odoo_pool_size
+        self.idle_timeout = settings.odoo_pool_idle_timeout if idle_timeout is None else idle_timeout
+        self.context = context
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.expired = 0
+        self.in_use = 0
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, timeout=timeout, context=self.context)
+        return http.client.HTTPConnection(self.host, timeout=timeout)
+
+    def acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        """Retourne une connexion et indique si elle est réutilisée.
+
+        Le délai par opération socket (connexion, envoi, lecture) est celui
+        de la tentative en cours (voir `attempt_timeout`).
+        """
+        timeout = attempt_timeout()
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            self.in_use += 1
+            while self._idle:
+                connection, last_used = self._idle.pop()
+                if now - last_used > self.idle_timeout:
+                    stale.append(connection)
+                    self.expired += 1
+                    continue
+                self.reused += 1
+                break
+            else:
+                connection = None
+                self.created += 1
+        for old in stale:
+            old.close()
+        if connection is None:
+            return self._new_connection(timeout), False
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection, True
+
+    def release(self, connection: http.client.HTTPConnection) -> None:
+        """Remet une connexion saine dans le pool (ou la ferme s'il est plein)."""
+        with self._lock:
+            self.in_use -= 1
+            if len(self._idle) < self.maxsize:
+                self._idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def discard(self, connection: http.client.HTTPConnection) -> None:
+        """Ferme une connexion dans un état incertain."""
+        with self._lock:
+            self.in_use -= 1
+        connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            connection.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "expired": self.expired,
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+            }
+
+
+_pools: dict[tuple[str, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(url: str) -> ConnectionPool:
+    """Retourne le pool partagé pour l'hôte de `url` (créé à la demande)."""
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    key = (parts.scheme, host)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(parts.scheme, host)
+        return pool
+
+
+def pool_stats() -> list[dict]:
+    """Compteurs de tous les pools (réutilisation des connexions), sans leur hôte."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
+
+
+class _CountingResponse:
+    """Enveloppe une réponse HTTP et compte les octets lus."""
+
+    def __init__(self, response, on_read) -> None:
+        self._response = response
+        self._on_read = on_read
+
+    def read(self, amt=None):
+        data = self._response.read(amt)
+        self._on_read(len(data))
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class _StaleConnection(Exception):
+    """Connexion réutilisée fermée par le serveur : la requête peut être rejouée."""
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """Transport XML-RPC qui emprunte ses connexions à un `ConnectionPool`.
+
+    Plusieurs threads peuvent l'utiliser en même temps : chaque requête
+    emprunte sa propre connexion. `on_read` reçoit le nombre d'octets de
+    chaque lecture de réponse (télémétrie).
+    """
+
+    def __init__(self, pool: ConnectionPool, on_read=None) -> None:
+        super().__init__()
+        self.pool = pool
+        self._on_read = on_read
+
+    def request(self, host, handler, request_body, verbose=False):
+        self.verbose = verbose  # lu par parse_response
+        # Une connexion réutilisée a pu être fermée côté serveur : on rejoue
+        # alors une fois sur une nouvelle connexion, comme xmlrpc.client
+        try:
+            return self._pooled_request(host, handler, request_body)
+        except _StaleConnection:
+            return self._pooled_request(host, handler, request_body)
+
+    def _pooled_request(self, host, handler, request_body):
+        _, extra_headers, _ = self.get_host_info(host)
+        headers = list(self._headers) + list(extra_headers or [])
+        headers += [
+            ("Accept-Encoding", "gzip"),
+            ("Content-Type", "text/xml"),
+            ("User-Agent", self.user_agent),
+        ]
+
+        connection, reused = self.pool.acquire()
+        try:
+            connection.putrequest("POST", handler, skip_accept_encoding=True)
+            self.send_headers(connection, headers)
+            self.send_content(connection, request_body)
+            response = connection.getresponse()
+        except _STALE_ERRORS as exc:
+            self.pool.discard(connection)
+            if reused:
+                raise _StaleConnection() from exc
+            raise
+        except BaseException:
+            self.pool.discard(connection)
+            raise
+
+        try:
+            if response.status != 200:
+                response.read()
+                raise xmlrpc.client.ProtocolError(
+                    host + handler, response.status, response.reason, dict(response.getheaders())
+                )
+            if self._on_read is not None:
+                return self.parse_response(_CountingResponse(response, self._on_read))
+            return self.parse_response(response)
+        finally:
+            # Réutilisable seulement si la réponse a été entièrement lue
+            # (y compris pour une Fault XML-RPC) et que le serveur garde la connexion
+            if response.isclosed() and not response.will_close:
+                self.pool.release(connection)
+            else:
+                self.pool.discard(connection)
+
+
+class JsonRpcProxy:
+    """Équivalent de `ServerProxy` sur le endpoint `/jsonrpc` d'Odoo.
+
+    `proxy.execute_kw(...)` appelle la méthode du service (`common`,
+    `object`) avec les mêmes arguments et le même résultat qu'en XML-RPC ;
+    les erreurs Odoo sont levées en `xmlrpc.client.Fault` pour que les
+    appelants n'aient pas à distinguer les deux protocoles. Les connexions
+    viennent du même `ConnectionPool`.
+    """
+
+    def __init__(self, pool: ConnectionPool, path: str, service: str, on_read=None) -> None:
+        self.pool = pool
+        self.path = path
+        self.service = service
+        self._on_read = on_read
+        self._ids = itertools.count(1)
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return functools.partial(self._call, method)
+
+    def _call(self, method: str, *args):
+        body = json.dumps({
+            "jsonrpc": "2.0",
+            "method": "call",
+            "params": {"service": self.service, "method": method, "args": args},
+            "id": next(self._ids),
+        }).encode()
+        try:
+            data = self._post(body)
+        except _StaleConnection:
+            data = self._post(body)
+        if self._on_read is not None:
+            self._on_read(len(data))
+
+        response = json.loads(data)
+        error = response.get("error")
+        if error:
+            details = error.get("data") or {}
+            raise xmlrpc.client.Fault(
+                details.get("name") or error.get("code"),
+                details.get("message") or error.get("message") or "Erreur JSON-RPC Odoo",
+            )
+        return response.get("result")
+
+    def _post(self, body: bytes) -> bytes:
+        connection, reused = self.pool.acquire()
+        try:
+            connection.request(
+                "POST", self.path, body, headers={"Content-Type": "application/json"}
+            )
+            response = connection.getresponse()
+            data = response.read()
+        except _STALE_ERRORS as exc:
+            self.pool.discard(connection)
+            if reused:
+                raise _StaleConnection() from exc
+            raise
+        except BaseException:
+            self.pool.discard(connection)
+            raise
+
+        if response.will_close:
+            self.pool.discard(connection)
+        else:
+            self.pool.release(connection)
+        if response.status != 200:
+            raise xmlrpc.client.ProtocolError(
+                self.pool.host + self.path, response.status, response.reason, dict(response.getheaders())
+            )
+        return data
@@ -0,0 +1,272 @@
+"""Délais, nouvelles tentatives et disjoncteur autour des appels Odoo.
+
+- Chaque appel a une échéance globale (`ODOO_DEADLINE_SECONDS`), tentatives
+  comprises ; chaque tentative est bornée par `ODOO_TIMEOUT_SECONDS`. Côté
+  synchrone, le délai de chaque opération réseau d'une tentative (connexion,
+  envoi, lecture) est en plus ramené au temps restant avant l'échéance
+  (`attempt_timeout`, appliqué par app.odoo_transport).
+- Les lectures idempotentes sont retentées (`ODOO_RETRY_ATTEMPTS`) sur les
+  erreurs transitoires (réseau, délai, HTTP 5xx), avec un backoff
+  exponentiel à jitter complet.
+- Un disjoncteur par hôte Odoo s'ouvre après
+  `ODOO_BREAKER_FAILURE_THRESHOLD` appels en échec consécutifs : les appels
+  échouent alors immédiatement (`OdooUnavailable`, HTTP 503) pendant
+  `ODOO_BREAKER_RESET_SECONDS`, puis un appel d'essai décide de la reprise.
+
+Les erreurs applicatives d'Odoo (`Fault`) ne sont ni retentées ni comptées :
+Odoo a répondu.
+"""
+import asyncio
+import http.client
+import random
+import threading
+import time
+import xmlrpc.client
+from collections.abc import Awaitable, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from .config import settings
+
+# Méthodes Odoo sans effet de bord, qui peuvent être rejouées sans risque
+IDEMPOTENT_METHODS = frozenset(
+    {"authenticate", "read", "search", "search_read", "search_count", "fields_get"}
+)
+
+# Plafond d'une attente entre deux tentatives
+_MAX_BACKOFF_SECONDS = 5.0
+
+
+class OdooUnavailable(RuntimeError):
+    """Odoo est injoignable, trop lent, ou le disjoncteur est ouvert."""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Disjoncteur thread-safe (fermé → ouvert → semi-ouvert → fermé)."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int | None = None,
+        reset_seconds: float | None = None,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.odoo_breaker_failure_threshold
+        self.reset_seconds = (
+            settings.odoo_breaker_reset_seconds if reset_seconds is None else reset_seconds
+        )
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._state = "half_open"
+            self._trial_in_flight = False
+        return self._state
+
+    def before_call(self) -> None:
+        """Lève `OdooUnavailable` si l'appel doit échouer immédiatement."""
+        with self._lock:
+            state = self._current_state()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_in_flight:
+                # Un seul appel d'essai à la fois
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self._opened_at + self.reset_seconds - time.monotonic())
+        raise OdooUnavailable(
+            f"Odoo indisponible (disjoncteur {self.name} ouvert)", retry_after=retry_after
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Libère l'appel d'essai interrompu sans résultat (annulation)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self.opened += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    """Disjoncteur partagé (clients synchrone et asynchrone) de l'hôte de `url`."""
+    parts = urlsplit(url)
+    name = f"{parts.scheme}://{parts.netloc}"
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def breaker_stats() -> list[dict]:
+    """État de tous les disjoncteurs, sans leur hôte (exposé par `/health`)."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.stats() for breaker in breakers]
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Erreur d'infrastructure (réseau, délai, 5xx), par opposition à une Fault."""
+    if isinstance(exc, xmlrpc.client.ProtocolError):
+        return exc.errcode >= 500
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(
+        exc, (OSError, http.client.HTTPException, httpx.TransportError, asyncio.TimeoutError)
+    )
+
+
+def backoff_delay(attempt: int) -> float:
+    """Attente avant la tentative `attempt + 1` (jitter complet)."""
+    ceiling = min(_MAX_BACKOFF_SECONDS, settings.odoo_retry_backoff_seconds * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+def _attempts(idempotent: bool) -> int:
+    return max(1, settings.odoo_retry_attempts) if idempotent else 1
+
+
+def _give_up(breaker: CircuitBreaker, exc: BaseException) -> OdooUnavailable:
+    breaker.record_failure()
+    return OdooUnavailable(f"Odoo injoignable: {exc or type(exc).__name__}")
+
+
+# Échéance de l'appel en cours dans ce thread (lue par le transport)
+_current = threading.local()
+
+
+def attempt_timeout() -> float:
+    """Délai d'une opération réseau : `ODOO_TIMEOUT_SECONDS`, borné par l'échéance.
+
+    Hors de `call_with_resilience`, seul `ODOO_TIMEOUT_SECONDS` s'applique.
+    Lève `TimeoutError` (erreur transitoire) si l'échéance est déjà passée.
+    """
+    timeout = settings.odoo_timeout_seconds
+    deadline = getattr(_current, "deadline", None)
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Échéance de l'appel Odoo dépassée")
+    return min(timeout, remaining)
+
+
+def _queue_timeout(bulkhead, deadline: float) -> float:
+    return max(0.0, min(bulkhead.timeout_seconds, deadline - time.monotonic()))
+
+
+def call_with_resilience(
+    breaker: CircuitBreaker, func: Callable, idempotent: bool, bulkhead=None
+):
+    """Appelle `func()` avec disjoncteur, nouvelles tentatives et échéance.
+
+    Avec `bulkhead` (voir app.bulkhead), chaque tentative occupe une place
+    du limiteur global ; l'attente d'une place est bornée par l'échéance.
+    Pendant `func()`, l'échéance est exposée au transport du thread courant
+    (voir `attempt_timeout`).
+    """
+    breaker.before_call()
+    deadline = time.monotonic() + settings.odoo_deadline_seconds
+    attempts = _attempts(idempotent)
+    outer_deadline = getattr(_current, "deadline", None)
+    for attempt in range(1, attempts + 1):
+        _current.deadline = deadline
+        try:
+            if bulkhead is None:
+                result = func()
+            else:
+                with bulkhead.slot(_queue_timeout(bulkhead, deadline)):
+                    result = func()
+        except OdooUnavailable:
+            # Limiteur saturé : Odoo n'est pas en cause
+            breaker.release_trial()
+            raise
+        except Exception as exc:
+            if not is_transient(exc):
+                breaker.record_success()
+                raise
+            delay = backoff_delay(attempt)
+            if attempt == attempts or time.monotonic() + delay >= deadline:
+                raise _give_up(breaker, exc) from exc
+            time.sleep(delay)
+            continue
+        finally:
+            _current.deadline = outer_deadline
+        breaker.record_success()
+        return result
+
+
+async def acall_with_resilience(
+    breaker: CircuitBreaker, func: Callable[[], Awaitable], idempotent: bool, bulkhead=None
+):
+    """Version asynchrone : chaque tentative est aussi bornée par l'échéance."""
+    breaker.before_call()
+    deadline = time.monotonic() + settings.odoo_deadline_seconds
+    attempts = _attempts(idempotent)
+    for attempt in range(1, attempts + 1):
+        try:
+            if bulkhead is None:
+                async with asyncio.timeout(max(0.0, deadline - time.monotonic())):
+                    result = await func()
+            else:
+                async with bulkhead.aslot(_queue_timeout(bulkhead, deadline)):
+                    async with asyncio.timeout(max(0.0, deadline - time.monotonic())):
+                        result = await func()
+        except (asyncio.CancelledError, OdooUnavailable):
+            # Annulé ou limiteur saturé : Odoo n'est pas en cause
+            breaker.release_trial()
+            raise
+        except Exception as exc:
+            if not is_transient(exc):
+                breaker.record_success()
+                raise
+            delay = backoff_delay(attempt)
+            if attempt == attempts or time.monotonic() + delay >= deadline:
+                raise _give_up(breaker, exc) from exc
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
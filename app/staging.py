@@ -0,0 +1,119 @@
+"""Réconciliation complète via la table tampon `contacts_staging`.
+
+Les pages Odoo sont d'abord chargées dans `contacts_staging` (INSERT simples,
+sans index à maintenir), puis fusionnées dans `contacts` par deux requêtes
+ensemblistes en fin de transaction : un upsert `INSERT ... SELECT ... ON
+CONFLICT` des lignes modifiées et un `DELETE` des contacts absents de la
+table tampon (`NOT EXISTS` sur PostgreSQL, `NOT IN` sur SQLite).
+Les verrous sur `contacts` ne sont donc tenus que le temps de la fusion, et
+la liste des IDs à supprimer n'est jamais envoyée depuis Python.
+"""
+import time
+from collections.abc import Iterable
+
+from sqlalchemy import and_, delete, exists, func, insert, or_, select, text, true
+from sqlalchemy.orm import Session
+
+from .bulk_upsert import SYNCED_FIELDS, batches, dialect_insert
+from .config import settings
+from .models import Contact, contacts_staging
+
+_COLUMNS = ("id", *SYNCED_FIELDS, "content_hash")
+
+
+def _differs(current, new) -> object:
+    """Vrai si une colonne synchronisée (ou l'empreinte) diffère.
+
+    Les colonnes elles-mêmes sont comparées, pas seulement l'empreinte
+    stockée : une ligne modifiée hors synchronisation est réparée par la
+    réconciliation complète.
+    """
+    return or_(*(current[name].is_distinct_from(new[name]) for name in _COLUMNS if name != "id"))
+
+
+def _vanished(db: Session, contacts, staged) -> object:
+    """Condition des contacts absents de la table tampon.
+
+    `NOT EXISTS` sur PostgreSQL (anti-jointure par hachage). SQLite ne sait
+    pas décorréler cette sous-requête et parcourrait toute la table tampon,
+    sans index, pour chaque contact : `NOT IN` y est évalué une seule fois
+    (index temporaire sur la table tampon).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return ~exists().where(staged.c.id == contacts.c.id)
+    return contacts.c.id.not_in(select(staged.c.id))
+
+
+def clear_staging(db: Session) -> None:
+    """Vide la table tampon (début et fin de réconciliation).
+
+    `TRUNCATE` sur PostgreSQL : un DELETE laisserait une ligne morte par
+    contact à chaque réconciliation, à nettoyer par l'autovacuum.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"TRUNCATE {contacts_staging.name}"))
+    else:
+        db.execute(delete(contacts_staging))
+
+
+def load_staging(db: Session, rows: Iterable[dict], batch_size: int | None = None) -> int:
+    """Charge des lignes (voir `contact_values`) dans la table tampon, par lots."""
+    batch_size = batch_size or settings.sync_batch_size
+    loaded = 0
+    for batch in batches(rows, batch_size):
+        db.execute(insert(contacts_staging), batch)
+        loaded += len(batch)
+    return loaded
+
+
+def merge_staging(db: Session) -> dict:
+    """Fusionne la table tampon dans `contacts` et retourne les compteurs.
+
+    Retourne aussi la durée de la comparaison (`diff_seconds`) et de la
+    fusion (`merge_seconds`). Ne fait pas de commit : l'appelant valide la
+    transaction juste après.
+    """
+    contacts = Contact.__table__
+    staged = contacts_staging
+
+    started = time.perf_counter()
+    joined = staged.outerjoin(contacts, contacts.c.id == staged.c.id)
+    total = db.execute(select(func.count()).select_from(staged)).scalar()
+    inserted = db.execute(
+        select(func.count()).select_from(joined).where(contacts.c.id.is_(None))
+    ).scalar()
+    updated = db.execute(
+        select(func.count())
+        .select_from(joined)
+        .where(
+            and_(
+                contacts.c.id.is_not(None),
+                _differs(contacts.c, staged.c),
+            )
+        )
+    ).scalar()
+    diff_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    # `WHERE true` : requis par SQLite pour lever l'ambiguïté SELECT / ON CONFLICT
+    source = select(*(staged.c[name] for name in _COLUMNS)).where(true())
+    stmt = dialect_insert(db)(contacts).from_select(list(_COLUMNS), source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={name: stmt.excluded[name] for name in _COLUMNS if name != "id"},
+        where=_differs(contacts.c, stmt.excluded),
+    )
+    db.execute(stmt)
+
+    deleted = db.execute(delete(contacts).where(_vanished(db, contacts, staged))).rowcount
+    merge_seconds = time.perf_counter() - started
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": total - inserted - updated,
+        "deleted": deleted,
+        "total": total,
+        "diff_seconds": diff_seconds,
+        "merge_seconds": merge_seconds,
+    }
@@ -0,0 +1,174 @@
+"""Verrou inter-processus empêchant deux synchronisations simultanées.
+
+- PostgreSQL : verrou consultatif transactionnel (`pg_try_advisory_xact_lock`)
+  pris dans la session de synchronisation ; il est libéré au commit ou au
+  rollback, et automatiquement si le processus meurt.
+- SQLite : ligne dans `sync_locks` avec une date d'expiration ; un verrou
+  expiré (processus mort) peut être repris par un autre processus. Le bail
+  est prolongé pendant la synchronisation (`SyncLease.renew`), qui s'arrête
+  si elle l'a perdu. Tant qu'une synchronisation écrit, la base est
+  verrouillée en écriture : un autre processus qui tente de prendre le
+  verrou à ce moment-là le trouve occupé.
+"""
+import hashlib
+import os
+import socket
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import SyncLock
+
+_POLL_SECONDS = 1.0
+
+
+class SyncLockLost(RuntimeError):
+    """Le bail du verrou a expiré et a été repris par un autre processus."""
+
+
+class SyncLease:
+    """Résultat de `sync_lock` : vrai si le verrou est détenu."""
+
+    def __init__(
+        self, db: Session, name: str, owner: str, dialect: str, ttl_seconds: int, acquired: bool
+    ) -> None:
+        self.db = db
+        self.name = name
+        self.owner = owner
+        self.dialect = dialect
+        self.ttl_seconds = ttl_seconds
+        self.acquired = acquired
+
+    def __bool__(self) -> bool:
+        return self.acquired
+
+    def renew(self) -> None:
+        """Prolonge le bail dans la transaction de `db` ; SyncLockLost s'il a été repris.
+
+        À appeler entre les pages et juste avant le commit. Sur SQLite, la
+        mise à jour rejoint la transaction de synchronisation, qui tient
+        déjà le verrou d'écriture de la base (tampon, upserts) : le bail ne
+        peut plus être repris avant le commit ou le rollback. Sans effet sur
+        PostgreSQL, où le verrou suit la transaction.
+        """
+        if not self.acquired or self.dialect != "sqlite":
+            return
+        table = SyncLock.__table__
+        result = self.db.execute(
+            update(table)
+            .where(table.c.name == self.name, table.c.owner == self.owner)
+            .values(expires_at=_utcnow() + timedelta(seconds=self.ttl_seconds))
+        )
+        if result.rowcount == 0:
+            raise SyncLockLost(f"Verrou '{self.name}' repris par un autre processus")
+
+
+def _utcnow() -> datetime:
+    # Datetime naïf en UTC : SQLite ne conserve pas le fuseau horaire
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _advisory_key(name: str) -> int:
+    """Clé bigint stable dérivée du nom du verrou."""
+    return int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big", signed=True)
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _try_acquire_advisory(db: Session, name: str) -> bool:
+    return bool(
+        db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _advisory_key(name)}
+        ).scalar()
+    )
+
+
+def _try_acquire_row(db: Session, name: str, owner: str, ttl: int) -> bool:
+    """Prend (ou reprend s'il a expiré) le verrou dans une transaction courte.
+
+    Si la base est verrouillée en écriture (synchronisation en cours dans un
+    autre processus), le verrou est considéré comme occupé.
+    """
+    now = _utcnow()
+    table = SyncLock.__table__
+    stmt = sqlite.insert(table).values(
+        name=name, owner=owner, acquired_at=now, expires_at=now + timedelta(seconds=ttl)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={
+            "owner": stmt.excluded.owner,
+            "acquired_at": stmt.excluded.acquired_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=table.c.expires_at < now,
+    )
+    try:
+        with db.get_bind().begin() as conn:
+            conn.execute(stmt)
+            current = conn.execute(select(table.c.owner).where(table.c.name == name)).scalar()
+    except OperationalError as exc:
+        if "database is locked" in str(exc.orig):
+            return False
+        raise
+    return current == owner
+
+
+def _release_row(db: Session, name: str, owner: str) -> None:
+    table = SyncLock.__table__
+    with db.get_bind().begin() as conn:
+        conn.execute(delete(table).where(table.c.name == name, table.c.owner == owner))
+
+
+@contextmanager
+def sync_lock(
+    db: Session,
+    name: str = "contacts",
+    wait_seconds: float | None = None,
+    ttl_seconds: int | None = None,
+) -> Iterator[SyncLease]:
+    """Tente de prendre le verrou `name` et renvoie un `SyncLease` (vrai s'il est détenu).
+
+    Si le verrou est occupé, réessaie pendant `wait_seconds`
+    (`SYNC_LOCK_WAIT_SECONDS`, 0 = abandon immédiat) puis renvoie False.
+    Sur PostgreSQL le verrou suit la transaction de `db` : l'appelant doit
+    donc commit/rollback dans le bloc. Sur SQLite, ce qui n'a pas été validé
+    dans le bloc est annulé avant de libérer le verrou (la transaction de
+    `db` bloquerait sinon la suppression de la ligne).
+    """
+    wait_seconds = settings.sync_lock_wait_seconds if wait_seconds is None else wait_seconds
+    ttl_seconds = ttl_seconds or settings.sync_lock_ttl_seconds
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        raise RuntimeError(f"Verrou de synchronisation non supporté pour '{dialect}'")
+
+    owner = _owner()
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        if dialect == "postgresql":
+            acquired = _try_acquire_advisory(db, name)
+        else:
+            acquired = _try_acquire_row(db, name, owner, ttl_seconds)
+        if acquired or time.monotonic() >= deadline:
+            break
+        if dialect == "postgresql":
+            # Ne pas garder ouverte la transaction d'attente
+            db.rollback()
+        time.sleep(min(_POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+
+    try:
+        yield SyncLease(db, name, owner, dialect, ttl_seconds, acquired)
+    finally:
+        if acquired and dialect == "sqlite":
+            db.rollback()
+            _release_row(db, name, owner)
@@ -0,0 +1,114 @@
+"""Pipeline producteur/consommateur pour la synchronisation.
+
+Un thread lit les pages Odoo et les dépose dans une file bornée pendant que
+le thread appelant les écrit en base : la lecture Odoo et les écritures se
+recouvrent, et la file bornée applique une contre-pression au producteur.
+"""
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator
+
+from .config import settings
+
+_DONE = object()
+
+
+class PagePipeline:
+    """Itère sur des pages produites par un thread dédié, avec mesure par étape.
+
+    - `fetch_seconds` : temps passé par le producteur à obtenir les pages ;
+    - `fetch_blocked_seconds` : temps où le producteur attendait une place
+      dans la file (le consommateur est le goulot d'étranglement) ;
+    - `write_seconds` : temps passé par le consommateur sur chaque page ;
+    - `write_waiting_seconds` : temps où le consommateur attendait une page
+      (la source est le goulot d'étranglement).
+    """
+
+    def __init__(self, pages: Iterable[list[dict]], maxsize: int | None = None):
+        self._pages = pages
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize or settings.sync_queue_size)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.pages = 0
+        self.max_queue_depth = 0
+        self.fetch_seconds = 0.0
+        self.fetch_blocked_seconds = 0.0
+        self.write_seconds = 0.0
+        self.write_waiting_seconds = 0.0
+
+    def _put(self, item) -> bool:
+        """Dépose un élément en attendant une place ; False si le pipeline est arrêté."""
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.fetch_blocked_seconds += time.perf_counter() - started
+
+    def _produce(self) -> None:
+        pages = iter(self._pages)
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                page = next(pages, _DONE)
+                self.fetch_seconds += time.perf_counter() - started
+                if page is _DONE or not self._put(page):
+                    break
+                self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        except BaseException as exc:  # transmis au consommateur
+            self._put(exc)
+            return
+        finally:
+            # Libère la source (ex: pool de lecture parallèle) dans son thread
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
+        self._put(_DONE)
+
+    def __iter__(self) -> Iterator[list[dict]]:
+        self._thread = threading.Thread(target=self._produce, name="sync-fetch", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                started = time.perf_counter()
+                item = self._queue.get()
+                self.write_waiting_seconds += time.perf_counter() - started
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                self.pages += 1
+                started = time.perf_counter()
+                yield item
+                self.write_seconds += time.perf_counter() - started
+        finally:
+            self.close()
+
+    def __enter__(self) -> "PagePipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Arrête le producteur (sortie anticipée ou erreur côté consommateur)."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def stats(self) -> dict:
+        """Durées par étape, arrondies à la milliseconde."""
+        return {
+            "pages": self.pages,
+            "max_queue_depth": self.max_queue_depth,
+            "fetch_seconds": round(self.fetch_seconds, 3),
+            "fetch_blocked_seconds": round(self.fetch_blocked_seconds, 3),
+            "write_seconds": round(self.write_seconds, 3),
+            "write_waiting_seconds": round(self.write_waiting_seconds, 3),
+        }
@@ -0,0 +1,109 @@
+"""Watermarks de synchronisation incrémentale stockés dans `sync_state`."""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import SyncState
+
+# Format des champs datetime renvoyés par Odoo (write_date)
+ODOO_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _utcnow() -> datetime:
+    # Datetime naïf en UTC : SQLite ne conserve pas le fuseau horaire
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def get_sync_state(db: Session, model: str) -> SyncState | None:
+    """Retourne l'état de synchronisation du modèle, s'il existe."""
+    return db.get(SyncState, model)
+
+
+def get_generation(db: Session, model: str) -> int:
+    """Génération des données du modèle (0 avant la première modification).
+
+    Une seule lecture par clé primaire dans `sync_state`, sans toucher aux
+    tables de données.
+    """
+    generation = db.execute(
+        select(SyncState.generation).where(SyncState.model == model)
+    ).scalar()
+    return generation or 0
+
+
+def needs_full_reconcile(state: SyncState | None, now: datetime | None = None) -> bool:
+    """Indique si une réconciliation complète est due.
+
+    Une synchronisation incrémentale ne voit pas les suppressions dans Odoo :
+    une synchronisation complète est donc forcée périodiquement
+    (`SYNC_FULL_RECONCILE_SECONDS`), ainsi qu'au premier passage.
+    """
+    if state is None or state.watermark_write_date is None:
+        return True
+    if state.last_full_sync_at is None:
+        return True
+    now = now or _utcnow()
+    interval = timedelta(seconds=settings.sync_full_reconcile_seconds)
+    return now - state.last_full_sync_at >= interval
+
+
+def max_watermark(records, current: tuple[str, int] | None = None) -> tuple[str, int] | None:
+    """Calcule le plus grand couple (write_date, id) parmi les enregistrements."""
+    watermark = current
+    for record in records:
+        write_date = record.get("write_date")
+        if not write_date:
+            continue
+        candidate = (write_date, record["id"])
+        if watermark is None or candidate > watermark:
+            watermark = candidate
+    return watermark
+
+
+def watermark_with_overlap(
+    watermark: tuple[str, int], overlap_seconds: float | None = None
+) -> tuple[str, int]:
+    """Point de reprise de la lecture incrémentale : le watermark reculé de l'overlap.
+
+    Une transaction Odoo validée tard porte une write_date antérieure à
+    celles déjà lues : relire les `SYNC_WATERMARK_OVERLAP_SECONDS` précédant
+    le watermark la rattrape (les contacts relus inchangés ne sont pas
+    réécrits, voir `content_hash`).
+    """
+    overlap_seconds = (
+        settings.sync_watermark_overlap_seconds if overlap_seconds is None else overlap_seconds
+    )
+    write_date, last_id = watermark
+    if overlap_seconds <= 0:
+        return watermark
+    start = datetime.fromisoformat(write_date) - timedelta(seconds=overlap_seconds)
+    return start.strftime(ODOO_DATETIME_FORMAT), 0
+
+
+def save_sync_state(
+    db: Session,
+    model: str,
+    watermark: tuple[str, int] | None,
+    full: bool,
+    changed: bool = False,
+) -> SyncState:
+    """Enregistre le nouveau watermark (sans commit).
+
+    `changed` incrémente la génération des données, dans la même transaction
+    que les écritures de la synchronisation.
+    """
+    now = _utcnow()
+    state = get_sync_state(db, model)
+    if state is None:
+        state = SyncState(model=model, watermark_id=0)
+        db.add(state)
+    if watermark is not None:
+        state.watermark_write_date, state.watermark_id = watermark
+    if full:
+        state.last_full_sync_at = now
+    if changed:
+        state.generation = (state.generation or 0) + 1
+    state.updated_at = now
+    return state
@@ -0,0 +1,154 @@
+"""Télémétrie des passages de synchronisation.
+
+Chaque passage est enregistré dans la table `sync_runs` et émis sur la sortie
+standard sous forme d'une ligne JSON (préfixe `SYNC_RUN`), exploitable par
+un collecteur de logs.
+"""
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from .models import SyncRun, SyncState
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _utcnow() -> datetime:
+    # Datetime naïf en UTC : SQLite ne conserve pas le fuseau horaire
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def reset_peak_memory() -> bool:
+    """Remet le pic de mémoire résidente au niveau actuel (Linux uniquement).
+
+    Permet de mesurer le pic d'un passage et non celui de toute la vie du
+    processus (mode `--daemon`). Retourne False si c'est impossible.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_memory_kb() -> int | None:
+    """Pic de mémoire résidente (Ko) depuis le dernier `reset_peak_memory`.
+
+    Hors Linux, pic depuis le démarrage du processus (`ru_maxrss`).
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class SyncRunRecorder:
+    """Collecte les mesures d'un passage puis les persiste et les journalise."""
+
+    def __init__(self) -> None:
+        reset_peak_memory()
+        self.started_at = _utcnow()
+        self._started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.bytes_received = 0
+        self.record: dict | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Mesure la durée d'une phase (cumulée si répétée)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def finish(self, outcome: str, report: dict | None = None, error: str | None = None) -> dict:
+        """Construit l'enregistrement final du passage."""
+        duration = time.perf_counter() - self._started
+        report = report or {}
+        stages = report.get("stages", {})
+        fetched = report.get("fetched")
+        self.record = {
+            "started_at": self.started_at,
+            "finished_at": _utcnow(),
+            "mode": report.get("mode"),
+            "outcome": outcome,
+            "error": error,
+            "fetched": fetched,
+            "inserted": report.get("inserted"),
+            "updated": report.get("updated"),
+            "unchanged": report.get("unchanged"),
+            "deleted": report.get("deleted"),
+            "total": report.get("total"),
+            "duration_seconds": round(duration, 3),
+            "auth_seconds": round(self.phases.get("auth", 0.0), 3),
+            "fetch_seconds": stages.get("fetch_seconds"),
+            "diff_seconds": stages.get("diff_seconds"),
+            "write_seconds": stages.get("write_seconds"),
+            "commit_seconds": round(self.phases.get("commit", 0.0), 3),
+            "rows_per_second": round(fetched / duration, 1) if fetched and duration else None,
+            "bytes_received": self.bytes_received,
+            "peak_memory_kb": peak_memory_kb(),
+        }
+        return self.record
+
+    def to_json_line(self) -> str:
+        record = dict(self.record or {})
+        for key in ("started_at", "finished_at"):
+            if record.get(key) is not None:
+                record[key] = record[key].isoformat()
+        return "SYNC_RUN " + json.dumps(record, ensure_ascii=False)
+
+    def save(self, db: Session) -> SyncRun:
+        """Insère le passage dans `sync_runs` et valide."""
+        run = SyncRun(**self.record)
+        db.add(run)
+        db.commit()
+        return run
+
+
+def get_sync_status(db: Session, limit: int = 10, model: str = "res.partner") -> dict:
+    """Derniers passages et fraîcheur des données (pour `/sync/status`)."""
+    runs = db.query(SyncRun).order_by(SyncRun.started_at.desc(), SyncRun.id.desc()).limit(limit).all()
+    last_success = (
+        db.query(SyncRun)
+        .filter(SyncRun.outcome == "success")
+        .order_by(SyncRun.started_at.desc())
+        .first()
+    )
+    state = db.get(SyncState, model)
+
+    # Les données sont au mieux aussi fraîches que le début du dernier passage réussi
+    lag = None
+    if last_success is not None:
+        lag = round((_utcnow() - last_success.started_at).total_seconds(), 3)
+
+    return {
+        "last_success_at": last_success.finished_at.isoformat() if last_success else None,
+        "data_lag_seconds": lag,
+        "watermark": {
+            "write_date": state.watermark_write_date if state else None,
+            "id": state.watermark_id if state else None,
+            "last_full_sync_at": (
+                state.last_full_sync_at.isoformat()
+                if state and state.last_full_sync_at
+                else None
+            ),
+        },
+        "generation": (state.generation or 0) if state else 0,
+        "runs": [run.to_dict() for run in runs],
+    }
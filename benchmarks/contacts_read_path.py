@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark du chemin de lecture de `/contacts` : ORM vs tuples Core.
+
+Remplit une base SQLite temporaire puis mesure le temps CPU par ligne de :
+
+- `orm` : l'ancien chemin, instances `Contact` hydratées, `to_dict()`, puis
+  `jsonable_encoder` et `JSONResponse` comme le fait FastAPI ;
+- `core` : `DBClient.get_contacts()` (colonnes en tuples Core) encodé par
+  `FastJSONResponse` (orjson).
+
+Usage: python benchmarks/contacts_read_path.py [--rows 100000] [--repeat 5]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.db_client import DBClient
+from app.json_response import FastJSONResponse
+from app.models import Contact
+
+
+def populate(session: Session, rows: int) -> None:
+    session.execute(
+        insert(Contact),
+        [
+            {
+                "id": i,
+                "name": f"Partenaire {i}",
+                "email": f"contact{i}@example.com" if i % 3 else None,
+                "phone": f"+33 1 23 45 {i % 100:02d} {i % 97:02d}" if i % 2 else None,
+            }
+            for i in range(1, rows + 1)
+        ],
+    )
+    session.commit()
+
+
+def orm_path(session: Session) -> bytes:
+    contacts = [contact.to_dict() for contact in session.query(Contact).order_by(Contact.id).all()]
+    return JSONResponse(jsonable_encoder(contacts)).body
+
+
+def core_path(session: Session) -> bytes:
+    return FastJSONResponse(DBClient(session).get_contacts()).body
+
+
+def median_cpu(repeat: int, func, session: Session) -> tuple[float, bytes]:
+    """Temps CPU médian de `repeat` appels (session vidée à chaque fois), et le dernier résultat."""
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        session.expunge_all()
+        started = time.process_time()
+        body = func(session)
+        timings.append(time.process_time() - started)
+    return statistics.median(timings), body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="Nombre de contacts en base")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de mesures par chemin")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            populate(session, args.rows)
+            print(f"{args.rows} contacts, médiane sur {args.repeat} lectures")
+            print(f"{'chemin':<8} {'CPU (s)':>10} {'µs/ligne':>10} {'octets':>12}")
+            results = {}
+            for name, func in (("orm", orm_path), ("core", core_path)):
+                seconds, body = median_cpu(args.repeat, func, session)
+                results[name] = (seconds, body)
+                print(f"{name:<8} {seconds:>10.4f} {seconds / args.rows * 1e6:>10.2f} {len(body):>12}")
+        engine.dispose()
+
+    orm_seconds, orm_body = results["orm"]
+    core_seconds, core_body = results["core"]
+    if orm_body != core_body:
+        print("ATTENTION : les deux chemins renvoient des réponses différentes")
+    print(f"gain : {(orm_seconds - core_seconds) / args.rows * 1e6:.2f} µs/ligne "
+          f"({orm_seconds / core_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
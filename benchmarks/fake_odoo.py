@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Serveur Odoo factice (XML-RPC et JSON-RPC) pour les benchmarks.
+
+Implémente `authenticate` (service `common`) et `search`, `search_read`,
+`search_count` et `read` sur `res.partner` (service `object`), sur les
+endpoints `/xmlrpc/2/common`, `/xmlrpc/2/object` et `/jsonrpc`, en HTTP/1.1
+keep-alive comme Odoo derrière un reverse proxy.
+
+Les partenaires (IDs 1..N) sont calculés à la demande à partir de leur ID :
+1M de partenaires ne coûtent pas de mémoire. Une latence (`--latency-ms`)
+et un taux d'erreurs HTTP 503 (`--error-rate`) peuvent être injectés.
+
+Usage: python benchmarks/fake_odoo.py [--partners 100000] [--port 8069]
+                                     [--latency-ms 0] [--error-rate 0]
+"""
+import argparse
+import json
+import random
+import time
+import xmlrpc.client
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UID = 2
+_EPOCH = datetime(2024, 1, 1)
+_FIELDS = ("name", "email", "phone", "is_company", "active", "write_date")
+
+
+class AccessDenied(Exception):
+    pass
+
+
+class FakePartners:
+    """`res.partner` généré : les champs sont dérivés de l'ID."""
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+
+    def record(self, partner_id: int, fields=None) -> dict:
+        full = {
+            "id": partner_id,
+            "name": f"Partenaire {partner_id}",
+            "email": f"contact{partner_id}@example.com" if partner_id % 3 else False,
+            "phone": f"+33 1 23 45 {partner_id % 100:02d} {partner_id % 97:02d}" if partner_id % 2 else False,
+            "is_company": partner_id % 10 == 0,
+            "active": partner_id % 50 != 0,
+            # Une seconde par ID : l'ordre des write_date suit celui des IDs
+            "write_date": (_EPOCH + timedelta(seconds=partner_id)).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if not fields:
+            fields = ("name", "email", "phone")
+        return {"id": partner_id, **{name: full[name] for name in fields if name in full}}
+
+    def _id_range(self, domain: list) -> range:
+        """Bornes d'ID tirées des termes `id` (évite de parcourir 1M d'IDs)."""
+        low, high = 1, self.count
+        if "|" in domain:
+            return range(low, high + 1)
+        for term in domain:
+            if isinstance(term, (list, tuple)) and term[0] == "id":
+                _, op, value = term
+                if op == ">":
+                    low = max(low, value + 1)
+                elif op == ">=":
+                    low = max(low, value)
+                elif op == "<":
+                    high = min(high, value - 1)
+                elif op == "<=":
+                    high = min(high, value)
+                elif op == "=":
+                    low, high = max(low, value), min(high, value)
+        return range(low, high + 1)
+
+    def _match(self, record: dict, domain: list) -> bool:
+        """Évalue un domaine Odoo (notation préfixée, '&' implicite)."""
+        stack = []
+        for term in reversed(domain):
+            if term == "|":
+                first, second = stack.pop(), stack.pop()
+                stack.append(first or second)
+            elif term == "&":
+                first, second = stack.pop(), stack.pop()
+                stack.append(first and second)
+            elif term == "!":
+                stack.append(not stack.pop())
+            else:
+                stack.append(self._term(record, *term))
+        return all(stack)
+
+    @staticmethod
+    def _term(record: dict, field: str, op: str, value) -> bool:
+        current = record.get(field)
+        if op == "=":
+            return current == value
+        if op == "!=":
+            return current != value
+        if op == "in":
+            return current in value
+        if op == "not in":
+            return current not in value
+        if op == "ilike":
+            return bool(current) and str(value).lower() in str(current).lower()
+        if op == ">":
+            return current > value
+        if op == ">=":
+            return current >= value
+        if op == "<":
+            return current < value
+        if op == "<=":
+            return current <= value
+        raise ValueError(f"Opérateur non supporté: {op}")
+
+    def search(self, domain=None, offset=0, limit=None, order=None, context=None) -> list[int]:
+        domain = list(domain or [])
+        active_test = (context or {}).get("active_test", True)
+        if active_test and not any(
+            isinstance(term, (list, tuple)) and term[0] == "active" for term in domain
+        ):
+            domain.append(("active", "=", True))
+        candidates = self._id_range(domain)
+        ids_term = next(
+            (term for term in domain if isinstance(term, (list, tuple)) and term[:2] == ["id", "in"]),
+            None,
+        )
+        if ids_term is not None:
+            candidates = sorted(i for i in set(ids_term[2]) if 1 <= i <= self.count)
+
+        found = []
+        for partner_id in candidates:
+            if self._match(self.record(partner_id, _FIELDS), domain):
+                if offset:
+                    offset -= 1
+                    continue
+                found.append(partner_id)
+                if limit and len(found) >= limit:
+                    break
+        return found
+
+    def execute(self, method: str, args: list, kwargs: dict):
+        if method == "search":
+            return self.search(args[0], **kwargs)
+        if method == "search_count":
+            return len(self.search(args[0], context=kwargs.get("context")))
+        if method == "search_read":
+            fields = kwargs.pop("fields", None)
+            ids = self.search(args[0], **kwargs)
+            return [self.record(i, fields) for i in ids]
+        if method == "read":
+            fields = kwargs.get("fields") or (args[1] if len(args) > 1 else None)
+            return [self.record(i, fields) for i in args[0] if 1 <= i <= self.count]
+        raise ValueError(f"Méthode non supportée: {method}")
+
+
+class FakeOdooServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, partners: int, latency_ms: float = 0, error_rate: float = 0) -> None:
+        super().__init__(address, FakeOdooHandler)
+        self.partners = FakePartners(partners)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.requests = 0
+
+    def dispatch(self, service: str, method: str, args: list):
+        if service == "common" and method == "authenticate":
+            return UID
+        if service == "object" and method == "execute_kw":
+            db, uid, password, model, model_method, model_args, *rest = args
+            if uid != UID:
+                raise AccessDenied("Access Denied")
+            if model != "res.partner":
+                raise ValueError(f"Modèle non supporté: {model}")
+            return self.partners.execute(model_method, model_args, dict(rest[0]) if rest else {})
+        raise ValueError(f"Méthode non supportée: {service}.{method}")
+
+
+class FakeOdooHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server: FakeOdooServer = self.server
+        server.requests += 1
+        payload = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if server.latency_ms:
+            time.sleep(random.expovariate(1 / server.latency_ms) / 1000)
+        if server.error_rate and random.random() < server.error_rate:
+            return self._send(503, b"Service Unavailable", "text/plain")
+
+        if self.path == "/jsonrpc":
+            request = json.loads(payload)
+            params = request["params"]
+            try:
+                result = {"result": server.dispatch(params["service"], params["method"], params["args"])}
+            except Exception as exc:
+                name = f"odoo.exceptions.{type(exc).__name__}"
+                result = {"error": {"code": 200, "message": "Odoo Server Error",
+                                    "data": {"name": name, "message": str(exc)}}}
+            body = json.dumps({"jsonrpc": "2.0", "id": request.get("id"), **result}).encode()
+            return self._send(200, body, "application/json")
+
+        if self.path not in ("/xmlrpc/2/common", "/xmlrpc/2/object"):
+            return self._send(404, b"Not Found", "text/plain")
+        args, method = xmlrpc.client.loads(payload, use_builtin_types=True)
+        try:
+            result = server.dispatch(self.path.rsplit("/", 1)[1], method, list(args))
+            body = xmlrpc.client.dumps((result,), methodresponse=True, allow_none=True)
+        except Exception as exc:
+            name = f"odoo.exceptions.{type(exc).__name__}"
+            body = xmlrpc.client.dumps(xmlrpc.client.Fault(name, str(exc)), allow_none=True)
+        self._send(200, body.encode(), "text/xml")
+
+
+def serve(partners: int, port: int = 0, latency_ms: float = 0, error_rate: float = 0, ready=None) -> None:
+    """Lance le serveur (bloquant) ; `ready` reçoit le port effectif."""
+    server = FakeOdooServer(("127.0.0.1", port), partners, latency_ms, error_rate)
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--partners", type=int, default=100_000, help="Nombre de res.partner générés")
+    parser.add_argument("--port", type=int, default=8069)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latence moyenne injectée par requête")
+    parser.add_argument("--error-rate", type=float, default=0, help="Proportion de réponses HTTP 503")
+    args = parser.parse_args()
+    print(f"Odoo factice sur http://127.0.0.1:{args.port} ({args.partners} partenaires)")
+    print("ODOO_DB=fake ODOO_USER=admin ODOO_PASSWORD=admin (valeurs quelconques)")
+    serve(args.partners, args.port, args.latency_ms, args.error_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark XML-RPC vs JSON-RPC pour les réponses `search_read` d'Odoo.
+
+Compare la taille des réponses et le temps de décodage côté client pour une
+liste de partenaires synthétiques (aucun Odoo requis). Avec `--live`, mesure
+aussi `get_contacts()` sur l'instance Odoo configurée (variables ODOO_*),
+avec chacun des deux protocoles.
+
+Usage: python benchmarks/odoo_protocols.py [--rows 50000] [--repeat 5] [--live]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import xmlrpc.client
+from pathlib import Path
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.odoo_client import OdooClient
+
+
+def synthetic_partners(count: int) -> list[dict]:
+    """Partenaires au format `search_read` (False pour les champs vides)."""
+    return [
+        {
+            "id": i,
+            "name": f"Partenaire {i}",
+            "email": f"contact{i}@example.com" if i % 3 else False,
+            "phone": f"+33 1 23 45 {i % 100:02d} {i % 97:02d}" if i % 2 else False,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def xmlrpc_payload(rows: list[dict]) -> bytes:
+    return xmlrpc.client.dumps((rows,), methodresponse=True, allow_none=True).encode()
+
+
+def jsonrpc_payload(rows: list[dict]) -> bytes:
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "result": rows}).encode()
+
+
+def decode_xmlrpc(payload: bytes) -> list[dict]:
+    # Même chemin que xmlrpc.client.Transport.parse_response
+    parser, unmarshaller = xmlrpc.client.getparser()
+    parser.feed(payload)
+    parser.close()
+    return unmarshaller.close()[0]
+
+
+def decode_jsonrpc(payload: bytes) -> list[dict]:
+    return json.loads(payload)["result"]
+
+
+def median_time(repeat: int, func, *args) -> tuple[float, object]:
+    """Durée médiane de `repeat` appels, et le dernier résultat."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def run_offline(rows: int, repeat: int) -> None:
+    partners = synthetic_partners(rows)
+    print(f"{rows} partenaires synthétiques, médiane sur {repeat} décodages")
+    print(f"{'protocole':<10} {'octets':>12} {'décodage (s)':>14} {'lignes/s':>12}")
+    for name, encode, decode in (
+        ("xmlrpc", xmlrpc_payload, decode_xmlrpc),
+        ("jsonrpc", jsonrpc_payload, decode_jsonrpc),
+    ):
+        payload = encode(partners)
+        seconds, decoded = median_time(repeat, decode, payload)
+        assert decoded == partners, f"{name}: résultat différent"
+        print(f"{name:<10} {len(payload):>12} {seconds:>14.4f} {rows / seconds:>12.0f}")
+
+
+def run_live(repeat: int) -> None:
+    print(f"\nOdoo configuré, médiane sur {repeat} appels get_contacts()")
+    print(f"{'protocole':<10} {'octets':>12} {'durée (s)':>14} {'lignes':>12}")
+    results = {}
+    for protocol in ("xmlrpc", "jsonrpc"):
+        client = OdooClient(protocol=protocol)
+        client.bytes_received = 0
+        seconds, contacts = median_time(repeat, client.get_contacts)
+        results[protocol] = contacts
+        print(
+            f"{protocol:<10} {client.bytes_received // repeat:>12} "
+            f"{seconds:>14.4f} {len(contacts):>12}"
+        )
+    if results["xmlrpc"] != results["jsonrpc"]:
+        print("ATTENTION : les deux protocoles renvoient des résultats différents")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000, help="Nombre de partenaires synthétiques")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de mesures par protocole")
+    parser.add_argument("--live", action="store_true", help="Mesurer aussi sur l'Odoo configuré")
+    args = parser.parse_args()
+
+    run_offline(args.rows, args.repeat)
+    if args.live:
+        run_live(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Benchmark de bout en bout contre le serveur Odoo factice.
+
+Pour chaque taille de `res.partner` (`--sizes`), lance `fake_odoo.py` dans
+un processus séparé puis mesure :
+
+- la synchronisation complète (`sync_contacts.py --full`, processus séparé,
+  base SQLite temporaire) : durée et pic de mémoire du processus ;
+- `/fetch` (application en mémoire via httpx.ASGITransport, cache court-
+  circuité par `Cache-Control: no-cache`) : latences p50/p99 de `--requests`
+  requêtes avec `--concurrency` requêtes simultanées.
+
+Usage: python benchmarks/run_benchmarks.py [--sizes 1000,100000,1000000]
+       [--requests 50] [--concurrency 10] [--fetch-limit 1000]
+       [--latency-ms 0] [--error-rate 0] [--skip-sync] [--skip-fetch]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_odoo import serve  # noqa: E402
+
+ODOO_ENV = {"ODOO_DB": "fake", "ODOO_USER": "admin", "ODOO_PASSWORD": "admin"}
+
+
+def start_fake_odoo(partners: int, latency_ms: float, error_rate: float):
+    """Démarre le serveur factice dans un processus et retourne (processus, URL)."""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=serve,
+        kwargs={
+            "partners": partners,
+            "latency_ms": latency_ms,
+            "error_rate": error_rate,
+            "ready": ready,
+        },
+        daemon=True,
+    )
+    process.start()
+    port = ready.get(timeout=10)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def bench_sync(url: str) -> dict:
+    """Synchronisation complète dans un processus séparé (durée, pic mémoire)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            **ODOO_ENV,
+            "ODOO_URL": url,
+            "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+        }
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, str(ROOT / "sync_contacts.py"), "--full"],
+            cwd=tmp,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        # wait4 : ressources du seul processus de synchronisation
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - started
+        stderr = process.stderr.read().decode(errors="replace")
+        process.stderr.close()
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"sync_contacts.py a échoué:\n{stderr}")
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {"sync_seconds": round(seconds, 2), "sync_peak_memory_mb": round(peak_kb / 1024, 1)}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _bench_fetch(url: str, requests: int, concurrency: int, fetch_limit: int) -> dict:
+    import httpx
+
+    from app.config import settings
+    from app.main import app
+
+    settings.odoo_url = url
+    for name, value in ODOO_ENV.items():
+        setattr(settings, name.lower(), value)
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(
+                    "/fetch",
+                    params={"limit": fetch_limit},
+                    headers={"Cache-Control": "no-cache"},
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+
+    return {
+        "fetch_p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "fetch_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "fetch_errors": errors,
+    }
+
+
+def bench_fetch(url: str, requests: int, concurrency: int, fetch_limit: int) -> dict:
+    return asyncio.run(_bench_fetch(url, requests, concurrency, fetch_limit))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Tailles de res.partner")
+    parser.add_argument("--requests", type=int, default=50, help="Requêtes /fetch par taille")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requêtes /fetch simultanées")
+    parser.add_argument("--fetch-limit", type=int, default=1000, help="Paramètre limit de /fetch")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latence Odoo injectée")
+    parser.add_argument("--error-rate", type=float, default=0, help="Proportion de 503 Odoo")
+    parser.add_argument("--skip-sync", action="store_true")
+    parser.add_argument("--skip-fetch", action="store_true")
+    args = parser.parse_args()
+
+    columns = ["partners", "sync_seconds", "sync_peak_memory_mb", "fetch_p50_ms", "fetch_p99_ms", "fetch_errors"]
+    print(" ".join(f"{name:>20}" for name in columns))
+    for size in (int(value) for value in args.sizes.split(",")):
+        process, url = start_fake_odoo(size, args.latency_ms, args.error_rate)
+        try:
+            result = {"partners": size}
+            if not args.skip_sync:
+                result.update(bench_sync(url))
+            if not args.skip_fetch:
+                result.update(bench_fetch(url, args.requests, args.concurrency, args.fetch_limit))
+        finally:
+            process.terminate()
+            process.join()
+        print(" ".join(f"{str(result.get(name, '-')):>20}" for name in columns))
+
+
+if __name__ == "__main__":
+    main()
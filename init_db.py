@@ -5,11 +5,11 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.database import Base, engine
+from app.database import create_tables, engine
 from app.models import Contact
 
 if __name__ == "__main__":
     print("🔄 Création des tables dans la base de données...")
-    Base.metadata.create_all(bind=engine)
+    create_tables(engine)
     print("✅ Tables créées avec succès!")
     print(f"   - Table: {Contact.__tablename__}")
@@ -9,5 +9,5 @@ if [ -f .env ]; then
     export $(grep -v '^#' .env | xargs)
 fi
 
-# Exécuter le script de synchronisation
-/usr/local/bin/uv run python sync_contacts.py
+# Exécuter le script de synchronisation (options transmises, ex: --daemon)
+/usr/local/bin/uv run python sync_contacts.py "$@"
@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
 """Script de synchronisation des contacts depuis Odoo vers la base de données.
 
-Ce script récupère tous les contacts depuis Odoo et les synchronise dans la base
+Ce script récupère les contacts depuis Odoo et les synchronise dans la base
 de données locale (insertion, mise à jour, suppression).
+
+Par défaut, seuls les contacts modifiés depuis le dernier watermark
+(write_date, id) sont demandés à Odoo ; une réconciliation complète est faite
+au premier passage, puis toutes les `SYNC_FULL_RECONCILE_SECONDS` ou avec
+`--full`.
+
+Avec `--daemon`, le script reste actif et synchronise toutes les
+`SYNC_INTERVAL_SECONDS` en conservant connexions et session Odoo.
+
+Usage: python sync_contacts.py [--full] [--daemon [--interval SECONDES]]
 """
+import argparse
+import random
+import signal
 import sys
+import threading
+import time
+from collections.abc import Callable
 from pathlib import Path
 
 # Ajouter le répertoire parent au path pour les imports
@@ -12,76 +28,360 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal, engine
-from app.models import Base, Contact
-from app.odoo_client import OdooClient
+from app.bulk_upsert import bulk_upsert_contacts, contact_values
+from app.config import settings
+from app.database import SessionLocal, create_tables, engine
+from app.models import Contact
+from app.odoo_client import CONTACT_FIELDS, OdooClient
+from app.staging import clear_staging, load_staging, merge_staging
+from app.sync_lock import sync_lock
+from app.sync_pipeline import PagePipeline
+from app.sync_state import (
+    get_sync_state,
+    max_watermark,
+    needs_full_reconcile,
+    save_sync_state,
+    watermark_with_overlap,
+)
+from app.sync_telemetry import SyncRunRecorder
+
+ODOO_MODEL = "res.partner"
+
+
+def _existing_hashes(db: Session, ids: list[int], chunk_size: int = 500) -> dict[int, str | None]:
+    """Retourne l'empreinte des contacts de `ids` déjà en base (requêtes IN par lots)."""
+    found: dict[int, str | None] = {}
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        found.update(
+            db.query(Contact.id, Contact.content_hash).filter(Contact.id.in_(chunk))
+        )
+    return found
+
+
+def run_sync(
+    db: Session,
+    odoo_client: OdooClient,
+    batch_size: int | None = None,
+    full: bool | None = None,
+    renew: Callable[[], None] | None = None,
+) -> dict:
+    """Synchronise les contacts Odoo dans la session `db` et retourne le rapport.
+
+    `full=None` choisit le mode selon l'état enregistré dans `sync_state`.
+    Les écritures passent par l'upsert ensembliste (un INSERT ... ON CONFLICT
+    par lot) ; le commit reste à la charge de l'appelant. Si des contacts
+    ont été insérés, modifiés ou supprimés, la génération des données est
+    incrémentée (ETag de `/contacts`). `renew` est appelé avant chaque
+    page (prolongation du verrou, voir app.sync_lock).
+    """
+    renew = renew or (lambda: None)
+    state = get_sync_state(db, ODOO_MODEL)
+    if full is None:
+        full = needs_full_reconcile(state)
+
+    if full:
+        report = _full_sync(db, odoo_client, batch_size, renew)
+    else:
+        watermark = (state.watermark_write_date, state.watermark_id)
+        report = _incremental_sync(db, odoo_client, watermark, batch_size, renew)
+
+    changed = any(report[key] for key in ("inserted", "updated", "deleted"))
+    save_sync_state(db, ODOO_MODEL, report.pop("watermark"), full=full, changed=changed)
+    return report
+
+
+def _apply_page(db: Session, page: list[dict], batch_size: int | None) -> dict:
+    """Applique une page Odoo : upsert des actifs modifiés, suppression des archivés.
+
+    Les empreintes de la page sont comparées en une requête à celles en base :
+    seules les lignes nouvelles ou dont l'empreinte a changé sont écrites.
+    """
+    active = [contact_values(contact) for contact in page if contact.get("active", True)]
+    archived_ids = [contact["id"] for contact in page if not contact.get("active", True)]
+    deleted_count = 0
+    if archived_ids:
+        deleted_count = db.query(Contact).filter(Contact.id.in_(archived_ids)).delete(
+            synchronize_session=False
+        )
+
+    diff_started = time.perf_counter()
+    existing = _existing_hashes(db, [row["id"] for row in active])
+    changed = [row for row in active if existing.get(row["id"], "") != row["content_hash"]]
+    diff_seconds = time.perf_counter() - diff_started
+    bulk_upsert_contacts(db, changed, batch_size=batch_size)
+
+    inserted_count = sum(1 for row in changed if row["id"] not in existing)
+    return {
+        "inserted": inserted_count,
+        "updated": len(changed) - inserted_count,
+        "unchanged": len(active) - len(changed),
+        "deleted": deleted_count,
+        "diff_seconds": diff_seconds,
+    }
+
+
+def _add_counts(totals: dict, counts: dict) -> None:
+    for key, value in counts.items():
+        totals[key] += value
+
+
+def _incremental_sync(
+    db: Session,
+    odoo_client: OdooClient,
+    watermark: tuple[str, int],
+    batch_size: int | None,
+    renew: Callable[[], None],
+) -> dict:
+    """Applique uniquement les contacts modifiés depuis le watermark, page par page.
+
+    La lecture reprend un peu avant le watermark (voir
+    `watermark_with_overlap`) ; le watermark enregistré, lui, ne recule
+    jamais. Les pages sont lues par le thread du `PagePipeline` pendant que
+    la page précédente est écrite en base.
+    """
+    since = watermark_with_overlap(watermark)
+    print(f"📥 Récupération des contacts modifiés depuis {since[0]} (id > {since[1]})...")
+    totals = dict.fromkeys(("inserted", "updated", "unchanged", "deleted", "diff_seconds"), 0)
+    fetched = 0
+    with PagePipeline(odoo_client.iter_contacts_modified_since(*since)) as pipeline:
+        for page in pipeline:
+            renew()
+            fetched += len(page)
+            _add_counts(totals, _apply_page(db, page, batch_size))
+            watermark = max_watermark(page, watermark)
+    print(f"✅ {fetched} contacts modifiés récupérés depuis Odoo")
+
+    # Le temps côté écriture du pipeline inclut la comparaison des empreintes
+    stages = pipeline.stats()
+    diff_seconds = totals.pop("diff_seconds")
+    stages["diff_seconds"] = round(diff_seconds, 3)
+    stages["write_seconds"] = round(pipeline.write_seconds - diff_seconds, 3)
+
+    return {
+        "mode": "incremental",
+        "fetched": fetched,
+        **totals,
+        "total": db.query(Contact).count(),
+        "watermark": watermark,
+        "stages": stages,
+    }
+
+
+def _full_sync(
+    db: Session, odoo_client: OdooClient, batch_size: int | None, renew: Callable[[], None]
+) -> dict:
+    """Réconciliation complète : tous les contacts, suppressions comprises.
+
+    Les pages Odoo sont chargées au fil de l'eau (pipeline lecture/écriture)
+    dans la table tampon `contacts_staging`, puis fusionnées dans `contacts`
+    par des requêtes ensemblistes juste avant le commit (voir app.staging).
+    """
+    print("📥 Récupération des contacts depuis Odoo...")
+    clear_staging(db)
+    watermark = None
+    fetched = 0
+
+    pages = odoo_client.iter_contact_pages(fields=CONTACT_FIELDS + ["write_date"])
+    with PagePipeline(pages) as pipeline:
+        for page in pipeline:
+            renew()
+            fetched += load_staging(
+                db, (contact_values(contact) for contact in page), batch_size=batch_size
+            )
+            watermark = max_watermark(page, watermark)
+    print(f"✅ {fetched} contacts récupérés depuis Odoo")
+
+    print("🔀 Fusion de la table tampon dans contacts...")
+    counts = merge_staging(db)
+    clear_staging(db)
+    if counts["deleted"]:
+        print(f"🗑️  {counts['deleted']} contacts supprimés")
+
+    stages = pipeline.stats()
+    stages["diff_seconds"] = round(counts.pop("diff_seconds"), 3)
+    stages["write_seconds"] = round(pipeline.write_seconds + counts.pop("merge_seconds"), 3)
+
+    return {
+        "mode": "full",
+        "fetched": fetched,
+        **counts,
+        "watermark": watermark,
+        "stages": stages,
+    }
+
+
+def _print_report(report: dict) -> None:
+    print(f"✅ Synchronisation terminée ({report['mode']}):")
+    print(f"   - {report['inserted']} contacts insérés")
+    print(f"   - {report['updated']} contacts mis à jour")
+    print(f"   - {report['unchanged']} contacts inchangés (non réécrits)")
+    print(f"   - {report['deleted']} contacts supprimés")
+    print(f"   - Total: {report['total']} contacts dans la base")
+    stages = report["stages"]
+    print(
+        f"⏱️  Odoo: {stages['fetch_seconds']}s, écriture: {stages['write_seconds']}s "
+        f"({stages['pages']} pages, attente écriture: {stages['write_waiting_seconds']}s, "
+        f"contre-pression: {stages['fetch_blocked_seconds']}s)"
+    )
 
 
-def sync_contacts():
-    """Synchronise les contacts depuis Odoo vers la base de données."""
-    # Créer les tables si elles n'existent pas
-    Base.metadata.create_all(bind=engine)
+def _connect() -> OdooClient:
+    print("🔄 Connexion à Odoo...")
+    return OdooClient()
 
+
+def _record_run(recorder: SyncRunRecorder) -> None:
+    """Émet la ligne JSON du passage et l'enregistre dans `sync_runs`."""
+    print(recorder.to_json_line())
     db: Session = SessionLocal()
     try:
-        print("🔄 Connexion à Odoo...")
-        odoo_client = OdooClient()
-
-        print("📥 Récupération des contacts depuis Odoo...")
-        odoo_contacts = odoo_client.get_contacts()
-        print(f"✅ {len(odoo_contacts)} contacts récupérés depuis Odoo")
-
-        # Récupérer tous les IDs Odoo existants dans la DB
-        existing_ids = {contact.id for contact in db.query(Contact.id).all()}
-        odoo_ids = {contact["id"] for contact in odoo_contacts}
-
-        # Contacts à supprimer (dans DB mais plus dans Odoo)
-        to_delete_ids = existing_ids - odoo_ids
-        if to_delete_ids:
-            print(f"🗑️  Suppression de {len(to_delete_ids)} contacts...")
-            db.query(Contact).filter(Contact.id.in_(to_delete_ids)).delete(
-                synchronize_session=False
-            )
+        recorder.save(db)
+    except Exception as exc:
+        db.rollback()
+        print(f"⚠️  Télémétrie non enregistrée: {exc}", file=sys.stderr)
+    finally:
+        db.close()
 
-        # Contacts à insérer ou mettre à jour
-        inserted_count = 0
-        updated_count = 0
-
-        for odoo_contact in odoo_contacts:
-            contact_id = odoo_contact["id"]
-            existing_contact = db.query(Contact).filter(Contact.id == contact_id).first()
-
-            if existing_contact:
-                # Mise à jour
-                existing_contact.name = odoo_contact.get("name")
-                existing_contact.email = odoo_contact.get("email")
-                existing_contact.phone = odoo_contact.get("phone")
-                updated_count += 1
-            else:
-                # Insertion
-                new_contact = Contact(
-                    id=contact_id,
-                    name=odoo_contact.get("name"),
-                    email=odoo_contact.get("email"),
-                    phone=odoo_contact.get("phone"),
-                )
-                db.add(new_contact)
-                inserted_count += 1
-
-        db.commit()
-        print(f"✅ Synchronisation terminée:")
-        print(f"   - {inserted_count} contacts insérés")
-        print(f"   - {updated_count} contacts mis à jour")
-        print(f"   - {len(to_delete_ids)} contacts supprimés")
-        print(f"   - Total: {len(odoo_contacts)} contacts dans la base")
 
+def _sync_once(get_client: Callable[[], OdooClient], full: bool = False) -> dict | None:
+    """Exécute une synchronisation dans sa propre session et la valide.
+
+    Le verrou est pris avant de contacter Odoo : si une autre synchronisation
+    le détient, retourne None sans rien faire. Lève l'exception d'origine
+    après rollback en cas d'erreur. Le passage est enregistré dans
+    `sync_runs` dans tous les cas.
+    """
+    recorder = SyncRunRecorder()
+    report = None
+    db: Session = SessionLocal()
+    try:
+        # Toute erreur, y compris à la prise ou à la libération du verrou,
+        # est enregistrée comme un échec
+        with sync_lock(db) as lease:
+            if not lease:
+                print("⏭️  Une autre synchronisation est en cours, passage ignoré")
+                recorder.finish("skipped")
+                return None
+            with recorder.phase("auth"):
+                odoo_client = get_client()
+            bytes_before = odoo_client.bytes_received
+            report = run_sync(
+                db, odoo_client, full=True if full else None, renew=lease.renew
+            )
+            recorder.bytes_received = odoo_client.bytes_received - bytes_before
+            with recorder.phase("commit"):
+                # Ne pas valider si le verrou a été repris entre-temps
+                lease.renew()
+                db.commit()
     except Exception as exc:
         db.rollback()
+        recorder.finish("error", report, error=str(exc))
+        raise
+    finally:
+        db.close()
+        if recorder.record is None:
+            recorder.finish("success", report)
+        _record_run(recorder)
+    _print_report(report)
+    return report
+
+
+def sync_contacts(full: bool = False):
+    """Synchronise les contacts depuis Odoo vers la base de données.
+
+    `full=True` force une réconciliation complète ; sinon le mode est choisi
+    d'après le watermark enregistré.
+    """
+    # Créer les tables (et colonnes ajoutées depuis) si elles n'existent pas
+    create_tables(engine)
+
+    try:
+        _sync_once(_connect, full=full)
+    except Exception as exc:
         print(f"❌ Erreur lors de la synchronisation: {exc}", file=sys.stderr)
         sys.exit(1)
+
+
+def _next_delay(started: float, interval: float, jitter: float) -> float:
+    """Délai avant le prochain passage (cadence fixe + jitter aléatoire)."""
+    elapsed = time.monotonic() - started
+    return max(0.0, interval - elapsed + random.uniform(-jitter, jitter))
+
+
+def run_daemon(
+    interval: float | None = None,
+    jitter: float | None = None,
+    stop_event: threading.Event | None = None,
+) -> None:
+    """Synchronise en boucle dans un processus long (mode `--daemon`).
+
+    L'engine SQLAlchemy, son pool de connexions et le client Odoo authentifié
+    sont conservés d'un passage à l'autre. Les passages démarrent toutes les
+    `interval` secondes (± `jitter`) ; SIGTERM et SIGINT arrêtent la boucle
+    après le passage en cours. Une erreur est journalisée sans arrêter le
+    démon, et le client Odoo est recréé au passage suivant.
+    """
+    interval = settings.sync_interval_seconds if interval is None else interval
+    jitter = settings.sync_interval_jitter_seconds if jitter is None else jitter
+    stop_event = stop_event or threading.Event()
+
+    def _request_stop(signum, frame):  # noqa: ARG001
+        print(f"🛑 Signal {signal.Signals(signum).name} reçu, arrêt après le passage en cours...")
+        stop_event.set()
+
+    previous_handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            previous_handlers[signum] = signal.signal(signum, _request_stop)
+
+    create_tables(engine)
+    print(f"🔁 Démon de synchronisation démarré (intervalle: {interval}s ± {jitter}s)")
+
+    clients: dict[str, OdooClient] = {}
+
+    def get_client() -> OdooClient:
+        if "odoo" not in clients:
+            clients["odoo"] = _connect()
+        return clients["odoo"]
+
+    try:
+        while not stop_event.is_set():
+            started = time.monotonic()
+            try:
+                _sync_once(get_client)
+            except Exception as exc:
+                print(f"❌ Erreur lors de la synchronisation: {exc}", file=sys.stderr)
+                # Ré-authentification au prochain passage
+                clients.clear()
+            stop_event.wait(_next_delay(started, interval, jitter))
     finally:
-        db.close()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+    print("👋 Démon de synchronisation arrêté")
 
 
 if __name__ == "__main__":
-    sync_contacts()
+    parser = argparse.ArgumentParser(description="Synchronise les contacts Odoo vers la base de données.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Force une réconciliation complète (détecte les suppressions)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Reste actif et synchronise périodiquement (SYNC_INTERVAL_SECONDS)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="Intervalle entre deux passages en mode --daemon (secondes)",
+    )
+    args = parser.parse_args()
+    if args.daemon:
+        run_daemon(interval=args.interval)
+    else:
+        sync_contacts(full=args.full)
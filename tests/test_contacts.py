@@ -1,13 +1,19 @@
+import asyncio
 import hashlib
 import hmac
+import json
 import time
+from datetime import datetime
+import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.contacts_cache import _ENTRY_OVERHEAD_BYTES, ContactsCache, contacts_cache
 from app.database import Base, get_db
+from app.fetch_cache import ResponseCache
 from app.main import app
-from app.models import Contact
+from app.models import Contact, SyncRun, SyncState
 from app.config import settings
 
 # Créer une base de données temporaire pour les tests (fichier temporaire)
@@ -44,9 +50,25 @@ def override_get_db():
 # Remplacer la dépendance get_db
 app.dependency_overrides[get_db] = override_get_db
 
+
+@pytest.fixture(autouse=True)
+def use_test_db():
+    """Rétablit l'override de get_db (les tests d'intégration vident les overrides)."""
+    app.dependency_overrides[get_db] = override_get_db
+
+
 # Créer le client de test
 client = TestClient(app)
 
+
+@pytest.fixture(autouse=True)
+def clear_contacts_cache():
+    """Les tests modifient la base sans synchronisation : repartir d'un cache vide."""
+    contacts_cache.clear()
+    yield
+    contacts_cache.clear()
+
+
 # Utiliser le secret depuis les settings (chargé depuis les variables d'environnement)
 HMAC_SECRET = settings.hmac_secret
 
@@ -185,3 +207,404 @@ def test_contacts_without_hmac():
     headers = {"Authorization": f"Bearer {token}"}
     resp2 = client.get("/contacts", headers=headers)
     assert resp2.status_code == 403
+
+
+def test_sync_status():
+    db = TestingSessionLocal()
+    try:
+        db.query(SyncRun).delete()
+        db.add(SyncRun(
+            started_at=datetime(2024, 1, 1, 12, 0, 0),
+            finished_at=datetime(2024, 1, 1, 12, 0, 5),
+            mode="incremental",
+            outcome="success",
+            fetched=10,
+            rows_per_second=2.0,
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    resp = client.get("/sync/status")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["last_success_at"] == "2024-01-01T12:00:05"
+    assert data["data_lag_seconds"] > 0
+    assert data["runs"][0]["mode"] == "incremental"
+    assert data["runs"][0]["rows_per_second"] == 2.0
+
+
+def test_fetch_uses_async_odoo_client(monkeypatch):
+    import app.main as main
+
+    calls = []
+
+    class FakeAsyncClient:
+        async def get_contacts(self, **query):
+            calls.append(1)
+            return [{"id": 1, "name": "John Doe", "email": False, "phone": False}]
+
+    monkeypatch.setattr(main, "get_async_odoo_client", FakeAsyncClient)
+    monkeypatch.setattr(main, "fetch_cache", ResponseCache(ttl_seconds=60, stale_seconds=0))
+
+    resp = client.get("/fetch")
+    assert resp.status_code == 200
+    assert resp.json()[0]["name"] == "John Doe"
+    assert resp.headers["X-Cache"] == "MISS"
+    assert client.get("/fetch").headers["X-Cache"] == "HIT"
+    assert client.get("/fetch", headers={"Cache-Control": "no-cache"}).headers["X-Cache"] == "BYPASS"
+    assert len(calls) == 2
+
+
+def test_fetch_cache_single_flight_and_stale_while_revalidate():
+    cache = ResponseCache(ttl_seconds=0.05, stale_seconds=60)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return len(calls)
+
+    async def scenario():
+        first = await asyncio.gather(*(cache.get("contacts", load) for _ in range(10)))
+        await asyncio.sleep(0.06)
+        # Périmé : l'ancienne valeur est servie, le rafraîchissement tourne en fond
+        stale = await cache.get("contacts", load)
+        await asyncio.sleep(0.03)
+        fresh = await cache.get("contacts", load)
+        return first, stale, fresh
+
+    first, stale, fresh = asyncio.run(scenario())
+
+    assert {value for value, _, _ in first} == {1}
+    assert [status for _, status, _ in first].count("MISS") == 10
+    assert stale[:2] == (1, "STALE")
+    assert fresh[:2] == (2, "HIT")
+    assert len(calls) == 2
+    assert cache.stats()["coalesced"] == 9
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_fetch_contact_by_id(monkeypatch):
+    import app.main as main
+
+    class FakeAsyncClient:
+        async def get_contact_by_id(self, contact_id):
+            return {"id": 1, "name": "John Doe"} if contact_id == 1 else None
+
+    monkeypatch.setattr(main, "get_async_odoo_client", FakeAsyncClient)
+
+    assert client.get("/fetch/1").json()["name"] == "John Doe"
+    assert client.get("/fetch/2").status_code == 404
+
+
+def test_fetch_returns_503_when_odoo_is_unavailable(monkeypatch):
+    import app.main as main
+    from app.resilience import OdooUnavailable
+
+    class DownAsyncClient:
+        async def get_contacts(self, **query):
+            raise OdooUnavailable("Odoo indisponible", retry_after=2.5)
+
+    monkeypatch.setattr(main, "get_async_odoo_client", DownAsyncClient)
+    monkeypatch.setattr(main, "fetch_cache", ResponseCache(ttl_seconds=60, stale_seconds=0))
+
+    resp = client.get("/fetch")
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "3"
+    assert "odoo_breakers" in client.get("/health").json()
+
+
+def test_health_does_not_expose_odoo_host():
+    from app.odoo_transport import get_pool
+    from app.resilience import get_breaker
+
+    get_pool("https://odoo-prive.example/xmlrpc/2/object")
+    get_breaker("https://odoo-prive.example/jsonrpc")
+    body = client.get("/health").text
+    assert '"odoo_pool"' in body and '"odoo_breakers"' in body
+    assert "odoo-prive.example" not in body
+
+
+def test_fetch_returns_429_when_odoo_queue_is_full(monkeypatch):
+    import app.main as main
+    from app.bulkhead import OdooBusy
+
+    class BusyAsyncClient:
+        async def get_contacts(self, **query):
+            raise OdooBusy("Trop d'appels Odoo en attente", retry_after=1)
+
+    monkeypatch.setattr(main, "get_async_odoo_client", BusyAsyncClient)
+    monkeypatch.setattr(main, "fetch_cache", ResponseCache(ttl_seconds=60, stale_seconds=0))
+
+    resp = client.get("/fetch")
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "1"
+    assert "odoo_bulkhead" in client.get("/health").json()
+
+
+def test_fetch_pushes_filters_down_to_odoo(monkeypatch):
+    import app.main as main
+
+    queries = []
+
+    class FakeAsyncClient:
+        async def get_contacts(self, **query):
+            queries.append(query)
+            return [{"id": 3, "email": "a@example.com"}]
+
+    monkeypatch.setattr(main, "get_async_odoo_client", FakeAsyncClient)
+    monkeypatch.setattr(main, "fetch_cache", ResponseCache(ttl_seconds=60, stale_seconds=0))
+
+    resp = client.get(
+        "/fetch",
+        params={
+            "email": "example.com",
+            "is_company": "false",
+            "ids": [3, 1, 3],
+            "modified_since": "2024-01-01T12:00:00+02:00",
+            "fields": "email,city",
+            "limit": 10,
+            "offset": 20,
+        },
+    )
+    assert resp.status_code == 200
+    assert queries == [{
+        "domain": [
+            ("email", "ilike", "example.com"),
+            ("is_company", "=", False),
+            ("id", "in", [1, 3]),
+            ("write_date", ">", "2024-01-01 10:00:00"),
+        ],
+        "fields": ["email", "city"],
+        "limit": 10,
+        "offset": 20,
+    }]
+
+    # Hors liste blanche : refusé sans appel à Odoo
+    assert client.get("/fetch", params={"fields": "password"}).status_code == 400
+    assert client.get("/fetch", params={"domain": "[]"}).status_code == 400
+    assert client.get("/fetch", params={"limit": settings.fetch_max_limit + 1}).status_code == 400
+    assert len(queries) == 1
+
+
+def test_contacts_keyset_pagination(monkeypatch):
+    monkeypatch.setattr(settings, "contacts_max_page_size", 2)
+    db = TestingSessionLocal()
+    try:
+        db.query(Contact).delete()
+        db.add_all(Contact(id=i, name=f"Contact {i}") for i in (3, 5, 8, 13, 21))
+        db.commit()
+    finally:
+        db.close()
+
+    token = client.post("/auth/login", data={"username": "admin", "password": "admin"}).json()["access_token"]
+
+    def get(params):
+        timestamp = str(int(time.time()))
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "X-Timestamp": timestamp,
+            "X-Signature": calculate_hmac("GET", "/contacts", timestamp),
+        }
+        return client.get("/contacts", params=params, headers=headers)
+
+    pages, params = [], {"limit": 2}
+    while True:
+        resp = get(params)
+        assert resp.status_code == 200
+        pages.append([contact["id"] for contact in resp.json()])
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            assert "Link" not in resp.headers
+            break
+        assert 'rel="next"' in resp.headers["Link"]
+        params = {"limit": 2, "after": cursor}
+    assert pages == [[3, 5], [8, 13], [21]]
+
+    assert get({"limit": 3}).status_code == 400
+    assert get({"after": "pas-un-curseur"}).status_code == 400
+    # Sans paramètre : liste complète, comme avant
+    assert len(get({}).json()) == 5
+
+
+def test_contacts_streaming_export(monkeypatch):
+    monkeypatch.setattr(settings, "contacts_stream_batch_size", 2)
+    db = TestingSessionLocal()
+    try:
+        db.query(Contact).delete()
+        db.add_all(Contact(id=i, name=f"Contact {i}", email=f"c{i}@example.com") for i in (4, 1, 9, 2, 7))
+        db.commit()
+    finally:
+        db.close()
+
+    token = client.post("/auth/login", data={"username": "admin", "password": "admin"}).json()["access_token"]
+
+    def get(params=None, accept=None):
+        timestamp = str(int(time.time()))
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "X-Timestamp": timestamp,
+            "X-Signature": calculate_hmac("GET", "/contacts", timestamp),
+        }
+        if accept:
+            headers["Accept"] = accept
+        return client.get("/contacts", params=params, headers=headers)
+
+    expected = [
+        {"id": i, "name": f"Contact {i}", "email": f"c{i}@example.com", "phone": None}
+        for i in (1, 2, 4, 7, 9)
+    ]
+
+    resp = get(accept="application/x-ndjson")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in resp.text.splitlines()] == expected
+
+    resp = get({"stream": "true"})
+    assert resp.status_code == 200
+    assert resp.json() == expected
+
+    assert get({"stream": "true", "limit": 2}).status_code == 400
+
+    db = TestingSessionLocal()
+    try:
+        db.query(Contact).delete()
+        db.commit()
+    finally:
+        db.close()
+    assert get({"stream": "true"}).json() == []
+    assert get(accept="application/x-ndjson").text == ""
+
+
+def test_fast_json_matches_standard_encoding():
+    from fastapi.responses import JSONResponse
+
+    from app import json_response
+
+    content = [{"id": 1, "name": "Zoé Müller", "email": None, "phone": "+33 1"}]
+    expected = JSONResponse(content).body
+    assert json_response.dumps(content) == expected
+    assert json_response.FastJSONResponse(content).body == expected
+
+
+def test_contacts_conditional_get_uses_sync_generation(monkeypatch):
+    # Génération relue à chaque requête
+    monkeypatch.setattr(settings, "contacts_cache_check_seconds", 0)
+    setup_test_db()
+    db = TestingSessionLocal()
+    try:
+        db.query(SyncState).delete()
+        db.add(SyncState(model="res.partner", watermark_id=0, generation=3))
+        db.commit()
+    finally:
+        db.close()
+
+    token = client.post("/auth/login", data={"username": "admin", "password": "admin"}).json()["access_token"]
+
+    def get(path, **extra):
+        timestamp = str(int(time.time()))
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "X-Timestamp": timestamp,
+            "X-Signature": calculate_hmac("GET", path, timestamp),
+            **extra,
+        }
+        return client.get(path, headers=headers)
+
+    resp = get("/contacts")
+    etag = resp.headers["ETag"]
+    assert resp.status_code == 200 and etag == '"g3-json"'
+
+    resp = get("/contacts", **{"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["ETag"] == etag
+    assert get("/contacts", **{"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+    assert get("/contacts/1", **{"If-None-Match": etag}).status_code == 304
+    # Autre représentation : autre ETag
+    ndjson = get("/contacts", Accept="application/x-ndjson", **{"If-None-Match": etag})
+    assert ndjson.status_code == 200 and ndjson.headers["ETag"] == '"g3-ndjson"'
+
+    # Une synchronisation qui modifie les contacts change l'ETag
+    db = TestingSessionLocal()
+    try:
+        db.get(SyncState, "res.partner").generation = 4
+        db.commit()
+    finally:
+        db.close()
+    resp = get("/contacts", **{"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == '"g4-json"'
+    assert resp.json()[0]["id"] == 1
+
+
+def test_contacts_cache_serves_bytes_until_generation_changes(monkeypatch):
+    setup_test_db()
+    token = client.post("/auth/login", data={"username": "admin", "password": "admin"}).json()["access_token"]
+
+    def get(path):
+        timestamp = str(int(time.time()))
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "X-Timestamp": timestamp,
+            "X-Signature": calculate_hmac("GET", path, timestamp),
+        }
+        return client.get(path, headers=headers)
+
+    # Compteurs cumulés depuis le démarrage du processus
+    before = contacts_cache.stats()
+    first = get("/contacts")
+    assert first.headers["X-Cache"] == "MISS"
+    assert get("/contacts/1").headers["X-Cache"] == "MISS"
+
+    # Modification hors synchronisation : invisible tant que la génération ne change pas
+    db = TestingSessionLocal()
+    try:
+        db.get(Contact, 1).name = "Jane Doe"
+        db.commit()
+    finally:
+        db.close()
+    second = get("/contacts")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert get("/contacts/1").headers["X-Cache"] == "HIT"
+
+    # Nouvelle génération, relue une fois l'intervalle écoulé : cache vidé
+    db = TestingSessionLocal()
+    try:
+        state = db.get(SyncState, "res.partner") or SyncState(model="res.partner", watermark_id=0)
+        state.generation = (state.generation or 0) + 1
+        db.add(state)
+        db.commit()
+    finally:
+        db.close()
+    monkeypatch.setattr(settings, "contacts_cache_check_seconds", 0)
+    third = get("/contacts")
+    assert third.headers["X-Cache"] == "MISS"
+    assert third.json()[0]["name"] == "Jane Doe"
+
+    stats = contacts_cache.stats()
+    assert {
+        key: stats[key] - before[key] for key in ("hits", "misses", "invalidations")
+    } == {"hits": 2, "misses": 3, "invalidations": 1}
+    assert 0 < stats["hit_rate"] < 1
+
+
+def test_contacts_cache_evicts_least_recently_used():
+    # Place pour deux entrées de 4 octets, surcoût par entrée compris
+    cache = ContactsCache(max_bytes=2 * (4 + _ENTRY_OVERHEAD_BYTES) + 2, check_seconds=60)
+    generation = cache.generation(lambda: 7)
+    cache.put("a", generation, b"aaaa")
+    cache.put("b", generation, b"bbbb")
+    assert cache.get("a", generation)[0] == b"aaaa"
+    cache.put("c", generation, b"cccc")  # évince "b", le moins récemment lu
+    assert cache.get("b", generation) is None
+    assert cache.get("c", generation)[0] == b"cccc"
+    cache.put("big", generation, b"x" * cache.max_bytes)  # plus grand que le cache : ignoré
+    assert cache.get("big", generation) is None
+    # Réponse lue à une génération périmée : non conservée
+    cache.put("d", generation - 1, b"d")
+    assert cache.get("d", generation) is None
+    assert cache.stats()["bytes"] == 2 * (4 + _ENTRY_OVERHEAD_BYTES)
+    assert cache.stats()["evictions"] == 1
@@ -7,8 +7,19 @@ from pathlib import Path
 # Ajouter le répertoire parent au path pour les imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import asyncio
+import json
+import threading
+import time
+import xmlrpc.client
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
 import pytest
 from app.odoo_client import OdooClient
+from app.odoo_session import SessionCache, session_cache
+from app.resilience import CircuitBreaker, OdooUnavailable
+from app.odoo_transport import ConnectionPool, PooledTransport
 from app.config import settings
 
 
@@ -109,3 +120,645 @@ def test_odoo_client_missing_env_vars():
         settings.odoo_db = original_db
         settings.odoo_user = original_user
         settings.odoo_password = original_password
+
+
+class _FakeModelsProxy:
+    """Proxy XML-RPC factice qui applique le keyset `id > last_id` de search_read."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.calls = []
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs):
+        self.calls.append((method, args, kwargs))
+        if method == "search":
+            return list(self.ids)
+        field, op, value = args[0][-1]
+        if op == "in":
+            return [{"id": i, "name": f"P{i}"} for i in self.ids if i in value]
+        rows = [{"id": i, "name": f"P{i}"} for i in self.ids if i > value]
+        return rows[: kwargs["limit"]]
+
+
+def _offline_client(ids):
+    """Client Odoo sans authentification, branché sur des proxies factices."""
+    client = OdooClient.__new__(OdooClient)
+    client.uid = 1
+    client._session_key = ("offline", None, None)
+    client._login = lambda: 1
+    client.breaker = CircuitBreaker("offline")
+    client.models = _FakeModelsProxy(ids)
+    client._local = threading.local()
+    return client
+
+
+def test_iter_contact_pages_uses_id_keyset():
+    """Teste la pagination keyset (sans Odoo réel)."""
+    client = _offline_client([3, 5, 8, 13, 21])
+
+    pages = list(client.iter_contact_pages(page_size=2, parallelism=1))
+
+    assert [[row["id"] for row in page] for page in pages] == [[3, 5], [8, 13], [21]]
+    assert [call[1][0][-1] for call in client.models.calls] == [
+        ("id", ">", 0),
+        ("id", ">", 5),
+        ("id", ">", 13),
+    ]
+    assert all(call[2]["order"] == "id asc" for call in client.models.calls)
+
+
+class _ModifiedSinceProxy:
+    """Proxy XML-RPC factice qui applique le keyset (write_date, id) de search_read."""
+
+    def __init__(self, partners):
+        self.partners = partners
+        self.calls = []
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs):
+        terms = {(t[0], t[1]): t[2] for t in args[0] if isinstance(t, tuple)}
+        cursor = (terms[("write_date", ">")], terms[("id", ">")])
+        self.calls.append((cursor, kwargs["order"]))
+        rows = sorted(
+            (p for p in self.partners.values() if (p["write_date"], p["id"]) > cursor),
+            key=lambda p: (p["write_date"], p["id"]),
+        )
+        return [dict(row) for row in rows[: kwargs["limit"]]]
+
+
+def test_iter_contacts_modified_since_pages_by_write_date():
+    """Un contact modifié pendant le parcours est relu par une page suivante."""
+    partners = {
+        1: {"id": 1, "write_date": "2024-01-01 10:05:00"},
+        2: {"id": 2, "write_date": "2024-01-01 10:01:00"},
+        3: {"id": 3, "write_date": "2024-01-01 10:03:00"},
+    }
+    client = _offline_client([])
+    client.models = _ModifiedSinceProxy(partners)
+
+    pages = []
+    for page in client.iter_contacts_modified_since("2024-01-01 10:00:00", 0, page_size=2):
+        pages.append([row["id"] for row in page])
+        if len(pages) == 1:
+            # Modifié après la lecture de sa page, avant celle des suivantes
+            partners[2]["write_date"] = "2024-01-01 10:06:00"
+
+    assert pages == [[2, 3], [1, 2]]
+    assert client.models.calls == [
+        (("2024-01-01 10:00:00", 0), "write_date asc, id asc"),
+        (("2024-01-01 10:03:00", 3), "write_date asc, id asc"),
+        (("2024-01-01 10:06:00", 2), "write_date asc, id asc"),
+    ]
+
+
+def test_iter_contact_pages_parallel_keeps_order(monkeypatch):
+    """Teste la lecture parallèle : une connexion par thread, pages dans l'ordre."""
+    ids = list(range(1, 24))
+    client = _offline_client(ids)
+    proxies = []
+    lock = threading.Lock()
+
+    class SlowProxy(_FakeModelsProxy):
+        def execute_kw(self, db, uid, password, model, method, args, kwargs):
+            # Les premières pages répondent le plus lentement
+            first_id = args[0][-1][2][0]
+            time.sleep(0.01 * (len(ids) - first_id) / len(ids))
+            return super().execute_kw(db, uid, password, model, method, args, kwargs)
+
+    def thread_models():
+        proxy = getattr(client._local, "models", None)
+        if proxy is None:
+            proxy = client._local.models = SlowProxy(ids)
+            with lock:
+                proxies.append(proxy)
+        return proxy
+
+    monkeypatch.setattr(client, "_thread_models", thread_models)
+
+    pages = list(client.iter_contact_pages(page_size=5, parallelism=3))
+
+    assert [row["id"] for page in pages for row in page] == ids
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert 1 <= len(proxies) <= 3
+    assert client.get_contacts(parallelism=3) == [row for page in pages for row in page]
+
+
+class _KeepAliveHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = "HTTP/1.1"
+    rpc_paths = ("/xmlrpc/2/common", "/xmlrpc/2/object")
+
+    def do_POST(self):
+        if self.path != "/jsonrpc":
+            return super().do_POST()
+        # Endpoint /jsonrpc d'Odoo, branché sur les mêmes fonctions
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        params = request["params"]
+        try:
+            result = {"result": self.server._dispatch(params["method"], params["args"])}
+        except Exception as exc:
+            result = {"error": {"code": 200, "message": "Odoo Server Error",
+                                "data": {"name": type(exc).__name__, "message": str(exc)}}}
+        body = json.dumps({"jsonrpc": "2.0", "id": request["id"], **result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _ThreadedXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def xmlrpc_server():
+    """Serveur XML-RPC local (HTTP/1.1 keep-alive) imitant Odoo."""
+    server = _ThreadedXMLRPCServer(
+        ("127.0.0.1", 0), requestHandler=_KeepAliveHandler, logRequests=False, allow_none=True
+    )
+
+    def execute_kw(db, uid, password, model, method, args, kwargs=None):
+        if method == "fail":
+            raise ValueError("AccessError")
+        if method == "slow":
+            time.sleep(2)
+            return []
+        if method == "read":
+            return [{"id": i, "name": f"P{i}", "email": False, "phone": "+33"} for i in args[0]]
+        return [{"id": 1, "name": "John Doe", "email": False, "phone": False}]
+
+    server.register_function(lambda *args: 2, "authenticate")
+    server.register_function(execute_kw, "execute_kw")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_pooled_transport_reuses_connections(xmlrpc_server):
+    pool = ConnectionPool("http", xmlrpc_server.removeprefix("http://"), maxsize=2, idle_timeout=60)
+    received = []
+    proxy = xmlrpc.client.ServerProxy(
+        f"{xmlrpc_server}/xmlrpc/2/object",
+        transport=PooledTransport(pool, on_read=received.append),
+    )
+
+    for _ in range(3):
+        assert proxy.execute_kw("db", 2, "pw", "res.partner", "search_read", [[]], {})[0]["id"] == 1
+    # Une Fault lit toute la réponse : la connexion reste réutilisable
+    with pytest.raises(xmlrpc.client.Fault):
+        proxy.execute_kw("db", 2, "pw", "res.partner", "fail", [[]], {})
+
+    stats = pool.stats()
+    assert (stats["created"], stats["reused"], stats["in_use"], stats["idle"]) == (1, 3, 0, 1)
+    assert sum(received) > 0
+    pool.close()
+
+
+def test_pooled_transport_drops_idle_connections(xmlrpc_server):
+    pool = ConnectionPool("http", xmlrpc_server.removeprefix("http://"), maxsize=2, idle_timeout=0)
+    proxy = xmlrpc.client.ServerProxy(
+        f"{xmlrpc_server}/xmlrpc/2/object", transport=PooledTransport(pool)
+    )
+
+    proxy.execute_kw("db", 2, "pw", "res.partner", "search_read", [[]], {})
+    time.sleep(0.01)
+    proxy.execute_kw("db", 2, "pw", "res.partner", "search_read", [[]], {})
+
+    stats = pool.stats()
+    assert (stats["created"], stats["reused"], stats["expired"]) == (2, 0, 1)
+    pool.close()
+
+
+def test_odoo_clients_share_connection_pool(xmlrpc_server, monkeypatch):
+    monkeypatch.setattr(settings, "odoo_url", xmlrpc_server)
+    monkeypatch.setattr(settings, "odoo_db", "db")
+    monkeypatch.setattr(settings, "odoo_user", "user")
+    monkeypatch.setattr(settings, "odoo_password", "pw")
+
+    first, second = OdooClient(), OdooClient()
+    first.get_contacts()
+    second.get_contacts()
+
+    assert first.models._ServerProxy__transport.pool is second.models._ServerProxy__transport.pool
+    stats = first.models._ServerProxy__transport.pool.stats()
+    assert stats["reused"] >= 1
+    assert first.bytes_received > 0
+
+
+def test_session_cache_single_login_for_concurrent_callers():
+    cache = SessionCache(ttl_seconds=60)
+    logins = []
+
+    def login():
+        time.sleep(0.05)
+        logins.append(1)
+        return 7
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_uid(("url", "db", "user"), login)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [7] * 8
+    assert len(logins) == 1
+    assert cache.stats()["logins"] == 1
+
+
+def test_session_cache_expires_after_ttl():
+    cache = SessionCache(ttl_seconds=0)
+    uids = iter([1, 2])
+
+    assert cache.get_uid(("url", "db", "user"), lambda: next(uids)) == 1
+    assert cache.get_uid(("url", "db", "user"), lambda: next(uids)) == 2
+
+
+def test_execute_kw_reauthenticates_on_access_denied():
+    client = _offline_client([1, 2])
+    client._session_key = ("access-denied", None, None)
+    session_cache.invalidate(client._session_key)
+    uids = iter([10, 11])
+    client._login = lambda: next(uids)
+
+    class ExpiringProxy(_FakeModelsProxy):
+        def execute_kw(self, db, uid, password, model, method, args, kwargs):
+            if uid == 10:
+                raise xmlrpc.client.Fault(3, "odoo.exceptions.AccessDenied: Access Denied")
+            return super().execute_kw(db, uid, password, model, method, args, kwargs)
+
+    client.models = ExpiringProxy([1, 2])
+
+    pages = list(client.iter_contact_pages(page_size=5, parallelism=1))
+
+    assert [row["id"] for row in pages[0]] == [1, 2]
+    assert client.uid == 11
+
+    class FailingProxy(_FakeModelsProxy):
+        def execute_kw(self, *args):
+            raise xmlrpc.client.Fault(1, "ValidationError")
+
+    # Les autres Faults ne déclenchent pas de ré-authentification
+    client.models = FailingProxy([])
+    with pytest.raises(xmlrpc.client.Fault):
+        list(client.iter_contact_pages(page_size=5, parallelism=1))
+    assert client.uid == 11
+    session_cache.invalidate(client._session_key)
+
+
+def _jsonrpc_odoo(calls, deny_uid=None):
+    """Transport httpx imitant le endpoint /jsonrpc d'Odoo."""
+    import json
+
+    import httpx
+
+    logins = iter(range(20, 100))
+
+    async def handler(request):
+        params = json.loads(request.content)["params"]
+        calls.append((params["service"], params["method"]))
+        if params["method"] == "authenticate":
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"jsonrpc": "2.0", "result": next(logins)})
+        db, uid, password, model, method, args, kwargs = params["args"]
+        if uid == deny_uid:
+            error = {"code": 200, "message": "Odoo Server Error",
+                     "data": {"name": "odoo.exceptions.AccessDenied", "message": "Access Denied"}}
+            return httpx.Response(200, json={"jsonrpc": "2.0", "error": error})
+        if method == "read":
+            result = [{"id": i, "name": f"P{i}", "email": False, "phone": False} for i in args[0]]
+        elif args[0] and args[0][0][:2] == ["id", "in"]:
+            # Les IDs supérieurs à 100 n'existent pas
+            result = [
+                {"id": i, "name": f"P{i}", "email": False, "phone": False}
+                for i in args[0][0][2] if i <= 100
+            ]
+        else:
+            result = [{"id": 1, "name": "P1", "email": False, "phone": False}]
+        return httpx.Response(200, json={"jsonrpc": "2.0", "result": result})
+
+    return httpx.AsyncClient(base_url="http://odoo.test", transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def odoo_settings(monkeypatch):
+    monkeypatch.setattr(settings, "odoo_url", "http://odoo.test")
+    monkeypatch.setattr(settings, "odoo_db", "db")
+    monkeypatch.setattr(settings, "odoo_user", "async-user")
+    monkeypatch.setattr(settings, "odoo_password", "pw")
+    session_cache.invalidate(("http://odoo.test", "db", "async-user"))
+    yield
+    session_cache.invalidate(("http://odoo.test", "db", "async-user"))
+
+
+def test_async_client_shares_one_login(odoo_settings):
+    from app.odoo_async import AsyncOdooClient
+
+    calls = []
+
+    async def scenario():
+        client = AsyncOdooClient(http=_jsonrpc_odoo(calls))
+        results = await asyncio.gather(*(client.get_contacts() for _ in range(20)))
+        contact = await client.get_contact_by_id(5)
+        await client.aclose()
+        return results, contact
+
+    results, contact = asyncio.run(scenario())
+
+    assert all(result == results[0] for result in results)
+    assert results[0][0]["email"] is False
+    assert contact["id"] == 5
+    assert calls.count(("common", "authenticate")) == 1
+    assert calls.count(("object", "execute_kw")) == 21
+
+
+def test_async_client_reauthenticates_on_access_denied(odoo_settings):
+    from app.odoo_async import AsyncOdooClient
+
+    calls = []
+    session_cache.store(("http://odoo.test", "db", "async-user"), 7)
+
+    async def scenario():
+        client = AsyncOdooClient(http=_jsonrpc_odoo(calls, deny_uid=7))
+        result = await client.get_contacts()
+        await client.aclose()
+        return client.uid, result
+
+    uid, result = asyncio.run(scenario())
+
+    assert uid == 20
+    assert result[0]["id"] == 1
+    assert calls == [("object", "execute_kw"), ("common", "authenticate"), ("object", "execute_kw")]
+
+
+def test_jsonrpc_protocol_matches_xmlrpc(xmlrpc_server, monkeypatch):
+    monkeypatch.setattr(settings, "odoo_url", xmlrpc_server)
+    monkeypatch.setattr(settings, "odoo_db", "db")
+    monkeypatch.setattr(settings, "odoo_user", "user")
+    monkeypatch.setattr(settings, "odoo_password", "pw")
+
+    xml_client = OdooClient(protocol="xmlrpc")
+    json_client = OdooClient(protocol="jsonrpc")
+
+    assert json_client.get_contacts() == xml_client.get_contacts()
+    assert json_client.get_contact_by_id(4) == xml_client.get_contact_by_id(4)
+    assert json_client.bytes_received > 0
+    # Les erreurs Odoo restent des Fault, comme en XML-RPC
+    with pytest.raises(xmlrpc.client.Fault, match="AccessError"):
+        json_client._execute_kw("res.partner", "fail", [[]])
+
+
+def test_unknown_protocol_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "odoo_url", "http://odoo.test")
+    monkeypatch.setattr(settings, "odoo_db", "db")
+    monkeypatch.setattr(settings, "odoo_user", "user")
+    monkeypatch.setattr(settings, "odoo_password", "pw")
+
+    with pytest.raises(ValueError):
+        OdooClient(protocol="soap")
+
+
+def test_contact_loader_coalesces_ids(odoo_settings):
+    from app.odoo_async import AsyncOdooClient
+
+    calls = []
+    reads = []
+
+    async def scenario():
+        client = AsyncOdooClient(http=_jsonrpc_odoo(calls))
+        client.contact_loader.max_batch_size = 3
+        fetch_many = client.contact_loader._fetch_many
+
+        async def recording_fetch(ids):
+            reads.append(sorted(ids))
+            return await fetch_many(ids)
+
+        client.contact_loader._fetch_many = recording_fetch
+        contacts = await asyncio.gather(
+            *(client.get_contact_by_id(contact_id) for contact_id in [1, 2, 2, 1, 3, 4, 404])
+        )
+        await client.aclose()
+        return contacts
+
+    contacts = asyncio.run(scenario())
+
+    assert [c["id"] if c else None for c in contacts] == [1, 2, 2, 1, 3, 4, None]
+    # IDs dédoublonnés, lots de 3 IDs au plus
+    assert reads == [[1, 2, 3], [4, 404]]
+
+
+def test_contact_loader_propagates_errors():
+    from app.odoo_loader import ContactLoader
+
+    async def failing_fetch(ids):
+        raise RuntimeError("Odoo indisponible")
+
+    async def scenario():
+        loader = ContactLoader(failing_fetch, max_batch_size=10, window_seconds=0.01)
+        return await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True), loader
+
+    results, loader = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert loader.stats()["batches"] == 1
+
+
+def test_reads_are_retried_on_transient_errors(monkeypatch):
+    monkeypatch.setattr(settings, "odoo_retry_backoff_seconds", 0)
+    client = _offline_client([1, 2])
+    failures = iter([ConnectionResetError(), TimeoutError()])
+
+    class FlakyProxy(_FakeModelsProxy):
+        def execute_kw(self, *args):
+            error = next(failures, None)
+            if error is not None:
+                raise error
+            return super().execute_kw(*args)
+
+    client.models = FlakyProxy([1, 2])
+    assert [row["id"] for row in client.get_contacts(domain=[("id", "in", [1, 2])])] == [1, 2]
+    assert len(client.models.calls) == 1
+
+    # Les écritures ne sont pas rejouées
+    failures = iter([ConnectionResetError()])
+    with pytest.raises(OdooUnavailable):
+        client._execute_kw("res.partner", "write", [[1], {"name": "X"}])
+
+
+def test_circuit_breaker_fails_fast_then_recovers(monkeypatch):
+    monkeypatch.setattr(settings, "odoo_retry_attempts", 1)
+    client = _offline_client([1])
+    client.breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=0.05)
+    calls = []
+
+    class DownProxy:
+        def execute_kw(self, *args):
+            calls.append(args)
+            raise ConnectionRefusedError()
+
+    client.models = DownProxy()
+    for _ in range(2):
+        with pytest.raises(OdooUnavailable):
+            client.get_contacts(domain=[("id", "in", [1])])
+    assert client.breaker.state == "open"
+
+    # Ouvert : échec immédiat, sans appel à Odoo
+    with pytest.raises(OdooUnavailable) as excinfo:
+        client.get_contacts(domain=[("id", "in", [1])])
+    assert len(calls) == 2
+    assert excinfo.value.retry_after > 0
+
+    time.sleep(0.06)
+    assert client.breaker.state == "half_open"
+    client.models = _FakeModelsProxy([1])
+    assert client.get_contacts(domain=[("id", "in", [1])])[0]["id"] == 1
+    assert client.breaker.stats()["state"] == "closed"
+
+
+def test_async_client_deadline(odoo_settings, monkeypatch):
+    import httpx
+
+    from app.odoo_async import AsyncOdooClient
+
+    monkeypatch.setattr(settings, "odoo_deadline_seconds", 0.05)
+    session_cache.store(("http://odoo.test", "db", "async-user"), 7)
+
+    async def slow_handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "result": []})
+
+    async def scenario():
+        http = httpx.AsyncClient(base_url="http://odoo.test", transport=httpx.MockTransport(slow_handler))
+        client = AsyncOdooClient(http=http)
+        client.breaker = CircuitBreaker("deadline")
+        started = time.monotonic()
+        with pytest.raises(OdooUnavailable):
+            await client.get_contacts()
+        await client.aclose()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 0.5
+
+
+def test_sync_client_attempt_is_bounded_by_deadline(xmlrpc_server, monkeypatch):
+    monkeypatch.setattr(settings, "odoo_url", xmlrpc_server)
+    monkeypatch.setattr(settings, "odoo_db", "db")
+    monkeypatch.setattr(settings, "odoo_user", "user")
+    monkeypatch.setattr(settings, "odoo_password", "pw")
+    client = OdooClient()
+    client.breaker = CircuitBreaker("deadline")
+    monkeypatch.setattr(settings, "odoo_timeout_seconds", 30)
+    monkeypatch.setattr(settings, "odoo_deadline_seconds", 0.3)
+
+    started = time.monotonic()
+    with pytest.raises(OdooUnavailable):
+        # Le serveur met 2 s à répondre ; ODOO_TIMEOUT_SECONDS seul ne suffit pas
+        client._execute_kw("res.partner", "slow", [[]])
+    assert time.monotonic() - started < 1.5
+
+
+def test_bulkhead_limits_threads_and_coroutines():
+    from app.bulkhead import Bulkhead
+
+    bulkhead = Bulkhead(max_in_flight=2, max_queue=10, timeout_seconds=5)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+
+    def thread_call():
+        with bulkhead.slot():
+            work()
+
+    async def coroutine_calls():
+        async def one():
+            async with bulkhead.aslot():
+                await asyncio.to_thread(work)
+
+        await asyncio.gather(*(one() for _ in range(4)))
+
+    threads = [threading.Thread(target=thread_call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    asyncio.run(coroutine_calls())
+    for thread in threads:
+        thread.join()
+
+    stats = bulkhead.stats()
+    assert max(peak) <= 2
+    assert (stats["acquired"], stats["in_flight"], stats["queued"]) == (8, 0, 0)
+    assert stats["max_queue_depth"] >= 1
+    assert stats["wait_seconds_max"] > 0
+
+
+def test_bulkhead_rejects_when_queue_is_full_and_times_out():
+    from app.bulkhead import Bulkhead, OdooBusy
+
+    bulkhead = Bulkhead(max_in_flight=1, max_queue=1, timeout_seconds=0.05)
+
+    async def scenario():
+        async with bulkhead.aslot():
+            waiting = asyncio.create_task(bulkhead.aslot().__aenter__())
+            await asyncio.sleep(0)
+            # File pleine : refus immédiat
+            with pytest.raises(OdooBusy):
+                async with bulkhead.aslot():
+                    pass
+            # Attente trop longue : 503
+            with pytest.raises(OdooUnavailable):
+                await waiting
+
+    asyncio.run(scenario())
+
+    stats = bulkhead.stats()
+    assert (stats["rejected"], stats["timeouts"], stats["in_flight"], stats["queued"]) == (1, 1, 0, 0)
+
+
+@pytest.fixture
+def fake_odoo(monkeypatch):
+    """Serveur Odoo factice des benchmarks (benchmarks/fake_odoo.py)."""
+    sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+    from fake_odoo import FakeOdooServer
+
+    server = FakeOdooServer(("127.0.0.1", 0), partners=250)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "odoo_url", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(settings, "odoo_db", "fake")
+    monkeypatch.setattr(settings, "odoo_user", "admin")
+    monkeypatch.setattr(settings, "odoo_password", "admin")
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("protocol", ["xmlrpc", "jsonrpc"])
+def test_client_against_fake_odoo(fake_odoo, protocol):
+    client = OdooClient(protocol=protocol)
+
+    pages = list(client.iter_contact_pages(page_size=100, parallelism=1))
+    # Un partenaire sur 50 est archivé
+    assert [len(page) for page in pages] == [100, 100, 45]
+    assert client.get_contact_by_id(7)["name"] == "Partenaire 7"
+    # Incrémental : les archivés (200, 250) sont inclus
+    modified = [
+        row["id"]
+        for page in client.iter_contacts_modified_since("2024-01-01 00:03:20", 200, page_size=20)
+        for row in page
+    ]
+    assert modified == list(range(201, 251))
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""Tests pour la synchronisation Odoo -> base de données (sans Odoo réel)."""
+
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire parent au path pour les imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.bulk_upsert import content_hash
+from app.config import settings
+from app.database import Base
+from app.models import Contact, SyncLock, SyncRun, SyncState, contacts_staging
+from app.staging import load_staging, merge_staging
+from app.sync_lock import SyncLockLost, sync_lock
+from app.sync_pipeline import PagePipeline
+from app.sync_state import watermark_with_overlap
+from app.sync_telemetry import SyncRunRecorder
+import sync_contacts
+from sync_contacts import run_sync
+
+
+def _counts(report):
+    return {
+        key: report[key]
+        for key in ("mode", "inserted", "updated", "unchanged", "deleted", "total")
+    }
+
+
+class FakeOdooClient:
+    """Client Odoo factice qui renvoie une liste de partenaires fixe, par pages."""
+
+    def __init__(self, partners, page_size=2):
+        self.partners = partners
+        self.page_size = page_size
+        self.calls = []
+
+    def _pages(self, records):
+        for start in range(0, len(records), self.page_size):
+            yield records[start:start + self.page_size]
+
+    def iter_contact_pages(self, domain=None, fields=None, page_size=None):
+        self.calls.append("iter_contact_pages")
+        return self._pages([p for p in self.partners if p.get("active", True)])
+
+    def iter_contacts_modified_since(self, write_date, last_id, page_size=None):
+        self.calls.append("iter_contacts_modified_since")
+        return self._pages([
+            p for p in self.partners
+            if (p.get("write_date") or "", p["id"]) > (write_date, last_id)
+        ])
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Fabrique de sessions sur une base SQLite temporaire."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(bind=engine)
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def db_session(session_factory):
+    """Session sur une base SQLite temporaire."""
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def test_sync_inserts_updates_and_deletes(db_session):
+    db_session.add_all([
+        Contact(id=1, name="Ancien nom", email="a@example.com", phone=None),
+        Contact(id=2, name="À supprimer", email=None, phone=None),
+    ])
+    db_session.commit()
+
+    odoo = FakeOdooClient([
+        {"id": 1, "name": "Nouveau nom", "email": "a@example.com", "phone": False},
+        {"id": 3, "name": "Nouveau", "email": False, "phone": "123"},
+    ])
+    report = run_sync(db_session, odoo, batch_size=1)
+    db_session.commit()
+
+    assert _counts(report) == {
+        "mode": "full", "inserted": 1, "updated": 1, "unchanged": 0, "deleted": 1, "total": 2,
+    }
+    contacts = {c.id: c for c in db_session.query(Contact).all()}
+    assert set(contacts) == {1, 3}
+    assert contacts[1].name == "Nouveau nom"
+    assert contacts[1].phone is None
+    assert contacts[3].email is None
+    assert contacts[3].phone == "123"
+    # La table tampon de la réconciliation complète est vidée après fusion
+    assert db_session.execute(select(func.count()).select_from(contacts_staging)).scalar() == 0
+
+
+def test_sync_is_idempotent(db_session):
+    partners = [{"id": i, "name": f"P{i}", "email": None, "phone": None} for i in range(1, 6)]
+
+    run_sync(db_session, FakeOdooClient(partners), batch_size=2)
+    db_session.commit()
+    report = run_sync(db_session, FakeOdooClient(partners), batch_size=2)
+    db_session.commit()
+
+    assert report["inserted"] == 0
+    assert report["updated"] == 0
+    assert report["unchanged"] == 5
+    assert report["deleted"] == 0
+    assert db_session.query(Contact).count() == 5
+    # Le passage sans modification ne change pas la génération (ni l'ETag de /contacts)
+    assert db_session.get(SyncState, "res.partner").generation == 1
+
+
+def test_sync_rewrites_only_changed_rows(db_session):
+    partners = [{"id": i, "name": f"P{i}", "email": None, "phone": None} for i in range(1, 4)]
+    run_sync(db_session, FakeOdooClient(partners), full=True)
+    db_session.commit()
+
+    partners[1]["email"] = "p2@example.com"
+    report = run_sync(db_session, FakeOdooClient(partners), full=True)
+    db_session.commit()
+
+    assert (report["updated"], report["unchanged"]) == (1, 2)
+    assert db_session.get(SyncState, "res.partner").generation == 2
+    contact = db_session.get(Contact, 2)
+    assert contact.email == "p2@example.com"
+    assert contact.content_hash == content_hash(contact.to_dict())
+
+
+def test_full_sync_repairs_rows_drifted_from_their_hash(db_session):
+    partners = [{"id": i, "name": f"P{i}", "email": None, "phone": None} for i in range(1, 4)]
+    run_sync(db_session, FakeOdooClient(partners), full=True)
+    db_session.commit()
+
+    # Modification hors synchronisation, empreinte laissée intacte
+    db_session.get(Contact, 2).name = "Modifié à la main"
+    db_session.commit()
+    report = run_sync(db_session, FakeOdooClient(partners), full=True)
+    db_session.commit()
+
+    assert (report["updated"], report["unchanged"]) == (1, 2)
+    db_session.expire_all()
+    assert db_session.get(Contact, 2).name == "P2"
+
+
+def test_full_sync_merge_scales_linearly(db_session):
+    rows = [
+        {"id": i, "name": f"P{i}", "email": None, "phone": None, "content_hash": None}
+        for i in range(1, 20_001)
+    ]
+    db_session.execute(insert(Contact), rows)
+    load_staging(db_session, rows[:-10])
+
+    started = time.perf_counter()
+    counts = merge_staging(db_session)
+    # Une suppression corrélée sans index prend plusieurs secondes à cette taille
+    assert time.perf_counter() - started < 2
+    assert (counts["deleted"], counts["total"]) == (10, 19_990)
+    assert db_session.query(Contact).count() == 19_990
+
+
+def test_incremental_sync_uses_watermark(db_session):
+    partners = [
+        {"id": 1, "name": "A", "email": None, "phone": None, "write_date": "2024-01-01 10:00:00"},
+        {"id": 2, "name": "B", "email": None, "phone": None, "write_date": "2024-01-01 10:00:00"},
+    ]
+    odoo = FakeOdooClient(partners)
+    assert run_sync(db_session, odoo)["mode"] == "full"
+    db_session.commit()
+
+    state = db_session.get(SyncState, "res.partner")
+    assert (state.watermark_write_date, state.watermark_id) == ("2024-01-01 10:00:00", 2)
+
+    # Rien n'a changé : aucune écriture
+    report = run_sync(db_session, odoo)
+    db_session.commit()
+    assert report["mode"] == "incremental"
+    assert (report["inserted"], report["updated"], report["deleted"]) == (0, 0, 0)
+
+    # Une modification, une création et un archivage
+    partners[0].update(name="A2", write_date="2024-01-02 09:00:00")
+    partners[1].update(active=False, write_date="2024-01-02 09:00:00")
+    partners.append(
+        {"id": 3, "name": "C", "email": None, "phone": None, "write_date": "2024-01-02 09:30:00"}
+    )
+    report = run_sync(db_session, odoo)
+    db_session.commit()
+
+    assert _counts(report) == {
+        "mode": "incremental", "inserted": 1, "updated": 1, "unchanged": 0, "deleted": 1, "total": 2,
+    }
+    assert odoo.calls == [
+        "iter_contact_pages",
+        "iter_contacts_modified_since",
+        "iter_contacts_modified_since",
+    ]
+    assert db_session.get(Contact, 1).name == "A2"
+    state = db_session.get(SyncState, "res.partner")
+    assert (state.watermark_write_date, state.watermark_id) == ("2024-01-02 09:30:00", 3)
+
+
+def test_incremental_sync_rereads_the_watermark_overlap(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "sync_watermark_overlap_seconds", 60)
+    partners = [
+        {"id": 1, "name": "A", "email": None, "phone": None, "write_date": "2024-01-01 10:00:00"},
+        {"id": 2, "name": "B", "email": None, "phone": None, "write_date": "2024-01-01 10:00:30"},
+    ]
+    odoo = FakeOdooClient(partners)
+    run_sync(db_session, odoo)
+    db_session.commit()
+
+    # Transaction Odoo validée tard : write_date antérieure au watermark
+    partners.append(
+        {"id": 3, "name": "C", "email": None, "phone": None, "write_date": "2024-01-01 10:00:10"}
+    )
+    report = run_sync(db_session, odoo)
+    db_session.commit()
+
+    assert (report["inserted"], report["updated"], report["unchanged"]) == (1, 0, 2)
+    assert db_session.get(Contact, 3).name == "C"
+    # Le watermark enregistré ne recule pas
+    state = db_session.get(SyncState, "res.partner")
+    assert (state.watermark_write_date, state.watermark_id) == ("2024-01-01 10:00:30", 2)
+
+
+def test_watermark_with_overlap():
+    assert watermark_with_overlap(("2024-01-01 00:00:30", 7), 60) == ("2023-12-31 23:59:30", 0)
+    assert watermark_with_overlap(("2024-01-01 00:00:30", 7), 0) == ("2024-01-01 00:00:30", 7)
+
+
+def test_page_pipeline_applies_backpressure_and_times_stages():
+    produced = []
+
+    def pages():
+        for i in range(6):
+            produced.append(i)
+            yield [{"id": i}]
+
+    consumed = []
+    with PagePipeline(pages(), maxsize=1) as pipeline:
+        for page in pipeline:
+            # Le producteur ne peut pas prendre plus d'une page d'avance (+1 en main)
+            assert len(produced) - len(consumed) <= 3
+            consumed.append(page[0]["id"])
+
+    assert consumed == list(range(6))
+    stats = pipeline.stats()
+    assert stats["pages"] == 6
+    assert stats["max_queue_depth"] <= 1
+
+
+def test_page_pipeline_propagates_producer_errors():
+    def pages():
+        yield [{"id": 1}]
+        raise RuntimeError("Odoo indisponible")
+
+    with pytest.raises(RuntimeError, match="Odoo indisponible"):
+        with PagePipeline(pages()) as pipeline:
+            for _ in pipeline:
+                pass
+
+
+def test_daemon_reuses_client_and_recovers_from_errors(monkeypatch):
+    stop = threading.Event()
+    created = []
+    runs = []
+
+    class Client:
+        def __init__(self):
+            created.append(self)
+
+    def sync_once(get_client, full=False):
+        runs.append(get_client())
+        if len(runs) == 2:
+            raise RuntimeError("Odoo indisponible")
+        if len(runs) == 4:
+            stop.set()
+        return {}
+
+    monkeypatch.setattr(sync_contacts, "OdooClient", Client)
+    monkeypatch.setattr(sync_contacts, "_sync_once", sync_once)
+    monkeypatch.setattr(sync_contacts, "create_tables", lambda bind: None)
+
+    sync_contacts.run_daemon(interval=0, jitter=0, stop_event=stop)
+
+    assert len(runs) == 4
+    # Même client pour les deux premiers passages, recréé après l'erreur
+    assert runs[0] is runs[1] is created[0]
+    assert runs[2] is runs[3] is created[1]
+
+
+def test_sync_lock_excludes_concurrent_runs(session_factory):
+    first, second = session_factory(), session_factory()
+    try:
+        with sync_lock(first, wait_seconds=0) as acquired:
+            assert acquired
+            with sync_lock(second, wait_seconds=0) as acquired_again:
+                assert not acquired_again
+        # Libéré en sortie de bloc
+        with sync_lock(second, wait_seconds=0) as acquired_again:
+            assert acquired_again
+        assert second.query(SyncLock).count() == 0
+    finally:
+        first.close()
+        second.close()
+
+
+def test_sync_lock_takes_over_expired_lease(session_factory):
+    db = session_factory()
+    try:
+        db.add(SyncLock(
+            name="contacts",
+            owner="processus-mort",
+            acquired_at=datetime(2020, 1, 1),
+            expires_at=datetime(2020, 1, 1, 0, 15),
+        ))
+        db.commit()
+        with sync_lock(db, wait_seconds=0) as acquired:
+            assert acquired
+    finally:
+        db.close()
+
+
+def test_sync_lock_lease_is_renewed_and_lost_on_takeover(session_factory):
+    db, other = session_factory(), session_factory()
+    try:
+        with sync_lock(db, wait_seconds=0, ttl_seconds=60) as lease:
+            expires_at = db.get(SyncLock, "contacts").expires_at
+            renewals = []
+
+            def renew():
+                renewals.append(True)
+                lease.renew()
+
+            # run_sync prolonge le bail avant chaque page
+            partners = [{"id": i, "name": f"P{i}", "email": None, "phone": None} for i in range(1, 4)]
+            run_sync(db, FakeOdooClient(partners, page_size=2), full=True, renew=renew)
+            lease.renew()
+            db.commit()
+            assert len(renewals) == 2
+            assert other.get(SyncLock, "contacts").expires_at >= expires_at
+
+            # Bail expiré puis repris par un autre processus : plus de commit possible
+            other.get(SyncLock, "contacts").owner = "autre-processus"
+            other.commit()
+            with pytest.raises(SyncLockLost):
+                lease.renew()
+            db.rollback()
+    finally:
+        db.close()
+        other.close()
+
+
+def test_sync_lock_is_released_when_sync_fails_after_renew(session_factory):
+    db, other = session_factory(), session_factory()
+    partners = [{"id": i, "name": f"P{i}", "email": None, "phone": None} for i in range(1, 4)]
+    try:
+        started = time.monotonic()
+        with pytest.raises(RuntimeError, match="Odoo indisponible"):
+            with sync_lock(db, wait_seconds=0) as lease:
+                run_sync(db, FakeOdooClient(partners, page_size=2), full=True, renew=lease.renew)
+                lease.renew()
+                raise RuntimeError("Odoo indisponible")
+        # L'erreur d'origine remonte sans attendre le délai de SQLite
+        assert time.monotonic() - started < 2
+        assert other.query(SyncLock).count() == 0
+        assert other.query(Contact).count() == 0
+        with sync_lock(other, wait_seconds=0) as acquired:
+            assert acquired
+    finally:
+        db.close()
+        other.close()
+
+
+def test_sync_lock_is_busy_while_another_sync_writes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}", connect_args={"timeout": 0.1})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db, other = factory(), factory()
+    try:
+        with sync_lock(db, wait_seconds=0) as lease:
+            lease.renew()  # verrou d'écriture SQLite tenu jusqu'au commit
+            with sync_lock(other, wait_seconds=0) as acquired:
+                assert not acquired
+            db.commit()
+    finally:
+        db.close()
+        other.close()
+        engine.dispose()
+
+
+def test_sync_once_records_run_telemetry(session_factory, monkeypatch, capsys):
+    monkeypatch.setattr(sync_contacts, "SessionLocal", session_factory)
+    partners = [{"id": i, "name": f"P{i}", "email": None, "phone": None} for i in range(1, 4)]
+    odoo = FakeOdooClient(partners)
+    odoo.bytes_received = 0
+
+    report = sync_contacts._sync_once(lambda: odoo, full=True)
+
+    db = session_factory()
+    try:
+        run = db.query(SyncRun).one()
+        assert run.outcome == "success"
+        assert run.mode == "full"
+        assert (run.fetched, run.inserted, run.total) == (3, 3, report["total"])
+        assert run.finished_at >= run.started_at
+        assert run.fetch_seconds is not None and run.commit_seconds is not None
+    finally:
+        db.close()
+    assert "SYNC_RUN {" in capsys.readouterr().out
+
+
+def test_sync_once_records_failed_run(session_factory, monkeypatch):
+    monkeypatch.setattr(sync_contacts, "SessionLocal", session_factory)
+
+    def failing_client():
+        raise RuntimeError("Échec d'authentification Odoo")
+
+    with pytest.raises(RuntimeError):
+        sync_contacts._sync_once(failing_client)
+
+    db = session_factory()
+    try:
+        run = db.query(SyncRun).one()
+        assert run.outcome == "error"
+        assert "authentification" in run.error
+    finally:
+        db.close()
+
+
+def test_sync_once_records_lock_failure_as_error(session_factory, monkeypatch, capsys):
+    monkeypatch.setattr(sync_contacts, "SessionLocal", session_factory)
+
+    @contextmanager
+    def failing_lock(db):
+        raise RuntimeError("database is locked")
+        yield
+
+    monkeypatch.setattr(sync_contacts, "sync_lock", failing_lock)
+    with pytest.raises(RuntimeError):
+        sync_contacts._sync_once(lambda: FakeOdooClient([]))
+
+    db = session_factory()
+    try:
+        run = db.query(SyncRun).one()
+        assert (run.outcome, run.error) == ("error", "database is locked")
+    finally:
+        db.close()
+    assert '"outcome": "error"' in capsys.readouterr().out
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="pic par passage : Linux uniquement")
+def test_sync_run_peak_memory_is_measured_per_run():
+    first = SyncRunRecorder()
+    ballast = bytearray(100 * 1024 * 1024)
+    ballast[::4096] = b"x" * len(ballast[::4096])  # pages réellement allouées
+    first_peak = first.finish("success")["peak_memory_kb"]
+    del ballast
+
+    # Un passage suivant (mode --daemon) ne reprend pas le pic du précédent
+    second_peak = SyncRunRecorder().finish("success")["peak_memory_kb"]
+    assert first_peak - second_peak > 50 * 1024